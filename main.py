@@ -1,25 +1,136 @@
-import matplotlib
-
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import seaborn as sns
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import warnings
 
 warnings.filterwarnings('ignore')
 
-from testfiles.mysql_test import mysql_tests
-from testfiles.postgres_test import postgresql_tests
-from testfiles.mongodb_test import mongo_tests
-from testfiles.dynamodb_test import dynamo_tests
+from testfiles.backends import (BACKENDS, backend_tests, backend_load_benchmark, backend_attribute,
+                                durability_modes, index_sets, parse_backends, supports_explain)
+from testfiles.results_store import save_run, list_runs, load_run, DEFAULT_STORE_PATH
+from testfiles.runner import LATENCY_PHASES
+from testfiles.profiling import HarnessProfiler, PROFILE_MODES, DEFAULT_PROFILE_DIR
+
+
+def pyplot():
+    # matplotlib ładujemy dopiero przy pierwszym wykresie; domyślnie bez okien (Agg).
+    import matplotlib
+    if 'matplotlib.pyplot' not in sys.modules:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+TEST_NAMES = [
+    'test_insert_book_genre',
+    'test_insert_user',
+    'test_insert_publisher_and_author',
+    'test_insert_order_and_return',
+    'test_insert_book_rating_group_by',
+    'test_insert_book_rating_join',
+    'test_get_order_with_book_and_author',
+    'test_get_average_book_rating_above',
+    'test_get_genre_book_counts_group_by',
+    'test_get_users_and_orders_join',
+    'test_update_genre_popularity',
+    'test_update_user_location',
+    'test_update_genre_popularity_group_by',
+    'test_update_user_with_order_join',
+    'test_delete_genre_by_id',
+    'test_delete_user_by_id',
+    'test_delete_books_with_few_ratings_group_by',
+    'test_delete_orders_with_user_join'
+]
+
+TEST_MAPPING = {
+    'test_insert_book_rating_group_by': {
+        'MongoDB': 'test_insert_book_rating_aggregation'
+    },
+    'test_insert_book_rating_join': {
+        'MongoDB': 'test_insert_book_rating_with_lookup'
+    },
+    'test_get_order_with_book_and_author': {
+        'MongoDB': 'test_get_order_with_book_and_author_lookup'
+    },
+    'test_get_average_book_rating_above': {
+        'MongoDB': 'test_get_average_book_rating_above_aggregation'
+    },
+    'test_get_genre_book_counts_group_by': {
+        'MongoDB': 'test_get_genre_book_counts_aggregation'
+    },
+    'test_get_users_and_orders_join': {
+        'MongoDB': 'test_get_users_and_orders_lookup'
+    },
+    'test_update_genre_popularity_group_by': {
+        'MongoDB': 'test_update_genre_popularity_aggregation'
+    },
+    'test_update_user_with_order_join': {
+        'MongoDB': 'test_update_user_with_order_lookup'
+    },
+    'test_delete_books_with_few_ratings_group_by': {
+        'MongoDB': 'test_delete_books_with_few_ratings_aggregation'
+    },
+    'test_delete_orders_with_user_join': {
+        'MongoDB': 'test_delete_orders_with_user_lookup'
+    }
+}
+
+METRICS = {
+    'seconds': 'Czas wykonania (s)',
+    'ops_per_second': 'Operacje/s',
+    'rows': 'Wiersze na operację',
+    'rows_per_second': 'Wiersze/s',
+    'read_capacity_units': 'RCU na operację',
+    'write_capacity_units': 'WCU na operację',
+}
+
+CHART_MANIFEST = '.chart_manifest.json'
+# Zwiększ przy zmianie wspólnego kodu rysowania (np. _save_figure), który nie należy do metody wykresu.
+CHART_CODE_VERSION = 1
+CHART_DPI = 300
+REPORT_DPI = 100
+REPORT_CHART_DIR = 'report_charts'
+DEFAULT_REPORT_PATH = 'benchmark_report.html'
+TIMELINE_BUCKET = 1.0
+
+PHASE_LABELS = {
+    'execute': 'Wykonanie (wysłanie + serwer)',
+    'fetch': 'Pobieranie wyników',
+    'commit': 'Zatwierdzanie',
+    'client': 'Klient (kod testu i sterownik)',
+}
 
 
 class DatabaseBenchmarkVisualizer:
-    def __init__(self):
+    def __init__(self, store_path=DEFAULT_STORE_PATH, show=False, workers=None, output_dir='.',
+                 force_charts=False, backends=None, charts=True):
+        self.store_path = store_path
+        self.show = show
+        self.workers = workers or os.cpu_count() or 1
+        self.output_dir = output_dir
+        self.dpi = CHART_DPI
+        self.force_charts = force_charts
+        self.saved_files = []
+        self.chart_files = []
+        self.backends = list(backends or BACKENDS)
+        self.charts = charts
+        if show:
+            pyplot().switch_backend('TkAgg')
+        self.run_id = None
         self.results = {}
+        self.details = {}
+        self.sweeps = {}
+        self.batch_sweep = {}
+        self.confidence = {}
+        self.scaling = {}
+        self._table = None
         self.colors = {
             'MySQL': '#1f77b4',
             'PostgreSQL': '#ff7f0e',
@@ -33,73 +144,195 @@ class DatabaseBenchmarkVisualizer:
             'DELETE': '#C73E1D'
         }
 
-    def run_all_tests(self):
-        print("🚀 Rozpoczynanie testów wydajności baz danych...")
+    def _run_backends(self, backend_kwargs=None, backends=None):
+        backend_kwargs = backend_kwargs or {}
 
-        databases = {
-            'MySQL': mysql_tests,
-            'PostgreSQL': postgresql_tests,
-            'MongoDB': mongo_tests,
-            'DynamoDB': dynamo_tests
-        }
-
-        for db_name, test_func in databases.items():
+        results = {}
+        details = {}
+        for db_name in self.backends:
+            if backends is not None and db_name not in backends:
+                continue
             print(f"\n📊 Testowanie {db_name}...")
             start_time = time.time()
+            details[db_name] = {}
 
             try:
-                test_results = test_func()
-                self.results[db_name] = test_results
+                test_func = backend_tests(db_name)
+                results[db_name] = test_func(details=details[db_name], **backend_kwargs.get(db_name, {}))
 
                 duration = time.time() - start_time
                 print(f"✅ {db_name} ukończone w {duration:.2f}s")
 
             except Exception as e:
                 print(f"❌ Błąd podczas testowania {db_name}: {e}")
-                self.results[db_name] = {}
+                results[db_name] = {}
 
-        print("\n📈 Generowanie wykresów porównawczych...")
-        self.generate_all_charts()
+        return results, details
 
-    def create_performance_overview_by_dataset(self):
-        data_sizes = list(next(iter(self.results.values())).keys()) if self.results else []
+    def _save_run(self, results, details, config):
+        try:
+            run_id = save_run(results, details, config, self.store_path)
+            print(f"💾 Zapisano przebieg {run_id} w {self.store_path}")
+            return run_id
+        except Exception as e:
+            print(f"❌ Błąd podczas zapisywania wyników: {e}")
+            return None
 
-        for data_size in data_sizes:
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
-            fig.suptitle(f'Wydajność baz danych - Rozmiar danych: {data_size:,}',
-                         fontsize=16, fontweight='bold')
+    def run_all_tests(self, duration=None, explain=False, profiler=None):
+        print("🚀 Rozpoczynanie testów wydajności baz danych...")
+
+        config = {'mode': 'all'}
+        backend_kwargs = {db_name: {} for db_name in self.backends}
+        if duration is not None:
+            print(f"⏱️ Tryb czasowy: każdy test powtarzany przez {duration:.0f}s")
+            config['duration'] = duration
+            for kwargs in backend_kwargs.values():
+                kwargs['duration'] = duration
+        if explain:
+            print("🔎 Zbieranie planów zapytań dla najwolniejszej instrukcji każdego testu")
+            config['explain'] = True
+            for db_name, kwargs in backend_kwargs.items():
+                if supports_explain(db_name):
+                    kwargs['explain'] = True
+        if profiler is not None:
+            # Profilowanie spowalnia klienta, więc taki przebieg porównujemy tylko z innymi profilowanymi.
+            print(f"🔬 Profilowanie klienta ({profiler.mode}), wyniki w {profiler.output_dir}")
+            config['profile'] = profiler.mode
+            for kwargs in backend_kwargs.values():
+                kwargs['profiler'] = profiler
+
+        if profiler is not None:
+            profiler.start()
+        try:
+            self.results, self.details = self._run_backends(backend_kwargs)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+        self._table = None
+        if profiler is not None:
+            written = profiler.write()
+            print(f"🔬 Zapisano {len(written)} plików profilu w {profiler.output_dir}")
+        self.run_id = self._save_run(self.results, self.details, config)
+
+        if self.charts:
+            print("\n📈 Generowanie wykresów porównawczych...")
+            self.generate_all_charts()
+        else:
+            self.compute_confidence_intervals()
+            self.print_summary()
+
+    def run_sweep(self, name, configurations):
+        print(f"🚀 Rozpoczynanie serii testów '{name}' ({len(configurations)} konfiguracji)...")
+
+        sweep = {}
+        for label, backend_kwargs in configurations.items():
+            print(f"\n🔧 Konfiguracja {name}: {label}")
+            results, details = self._run_backends(backend_kwargs, backends=list(backend_kwargs))
+            run_id = self._save_run(results, details,
+                                    {'mode': 'sweep', 'sweep': name, 'label': label, 'backends': backend_kwargs})
+            sweep[label] = {'results': results, 'details': details, 'run_id': run_id}
+
+        self.sweeps[name] = sweep
+        if self.charts:
+            self.create_sweep_comparison(name)
+        self.print_sweep_summary(name)
+        return sweep
+
+    def run_index_matrix(self, sets=('none', 'primary', 'full')):
+        # Backend bierze udział tylko w zestawach, które faktycznie rozróżnia (InnoDB i DynamoDB zawsze mają klucz główny).
+        backend_sets = {db_name: index_sets(db_name) for db_name in self.backends}
+        configurations = {
+            index_set: {db_name: {'index_set': index_set}
+                        for db_name, supported in backend_sets.items() if index_set in supported}
+            for index_set in sets
+        }
+        return self.run_sweep('indeksy', configurations)
+
+    def run_durability_sweep(self, modes=('default', 'durable', 'relaxed', 'autocommit')):
+        backend_modes = {db_name: durability_modes(db_name) for db_name in self.backends
+                         if db_name in ('MySQL', 'PostgreSQL', 'MongoDB')}
+        configurations = {
+            mode: {db_name: {'durability': mode} for db_name, supported in backend_modes.items() if mode in supported}
+            for mode in modes
+        }
+        return self.run_sweep('trwalosc', configurations)
+
+    def run_isolation_sweep(self, levels=('read_committed', 'repeatable_read', 'serializable')):
+        configurations = {
+            level: {db_name: {'isolation': level} for db_name in self.backends if db_name in ('MySQL', 'PostgreSQL')}
+            for level in levels
+        }
+        return self.run_sweep('izolacja', configurations)
 
-            operations = ['CREATE', 'READ', 'UPDATE', 'DELETE']
+    def run_batch_sweep(self, batch_sizes=(1, 10, 100, 1000, 10000), data_size=10000):
+        print(f"🚀 Rozpoczynanie serii rozmiarów partii {list(batch_sizes)} dla {data_size:,} rekordów...")
 
-            for idx, operation in enumerate(operations):
-                ax = [ax1, ax2, ax3, ax4][idx]
-                db_names = []
-                times = []
+        for db_name in self.backends:
+            print(f"\n📦 Ładowanie {db_name}...")
+            try:
+                sizes = batch_sizes
+                max_batch = backend_attribute(db_name, 'max_batch')
+                if max_batch is not None:
+                    sizes = sorted({min(size, max_batch) for size in batch_sizes})
+                load_benchmark = backend_load_benchmark(db_name)
+                self.batch_sweep[db_name] = load_benchmark(batch_sizes=sizes, data_size=data_size)
+            except Exception as e:
+                print(f"❌ Błąd podczas ładowania {db_name}: {e}")
+                self.batch_sweep[db_name] = {}
 
-                for db_name, db_data in self.results.items():
-                    if db_data and data_size in db_data and operation in db_data[data_size]:
-                        db_names.append(db_name)
-                        times.append(db_data[data_size][operation])
+        if self.charts:
+            self.create_batch_sweep_charts()
+        self.print_batch_sweep_summary()
+        return self.batch_sweep
 
-                if db_names and times:
-                    bars = ax.bar(db_names, times, color=self.crud_colors[operation], alpha=0.8)
+    def create_performance_overview_by_dataset(self):
+        for data_size in self.data_sizes():
+            self._create_performance_overview_for_size(data_size)
+
+    def _create_performance_overview_for_size(self, data_size):
+        import numpy as np
+        plt = pyplot()
+        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
+        fig.suptitle(f'Wydajność baz danych - Rozmiar danych: {data_size:,}',
+                     fontsize=16, fontweight='bold')
 
-                    for bar, time_val in zip(bars, times):
-                        height = bar.get_height()
-                        ax.text(bar.get_x() + bar.get_width() / 2., height + height * 0.01,
-                                f'{time_val:.3f}s', ha='center', va='bottom', fontweight='bold')
+        operations = ['CREATE', 'READ', 'UPDATE', 'DELETE']
 
-                    ax.set_ylabel('Czas wykonania (s)', fontweight='bold')
-                    ax.set_title(f'Operacja {operation}', fontweight='bold')
-                    ax.set_yscale('log')
-                    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                    ax.grid(True, alpha=0.3, axis='y')
+        for idx, operation in enumerate(operations):
+            ax = [ax1, ax2, ax3, ax4][idx]
+            db_names = []
+            times = []
+            errors = []
 
-            plt.tight_layout()
-            plt.savefig(f'performance_overview_{data_size}.png', dpi=300, bbox_inches='tight')
-            plt.show()
+            for db_name, db_data in self.results.items():
+                if db_data and data_size in db_data and operation in db_data[data_size]:
+                    db_names.append(db_name)
+                    times.append(db_data[data_size][operation])
+                    errors.append(self._error_bar(db_name, data_size, operation, times[-1]))
+
+            if db_names and times:
+                bars = ax.bar(db_names, times, color=self.crud_colors[operation], alpha=0.8,
+                              yerr=np.array(errors).T, capsize=5, ecolor='black')
+
+                for bar, time_val, (_, upper) in zip(bars, times, errors):
+                    height = bar.get_height() + upper
+                    ax.text(bar.get_x() + bar.get_width() / 2., height + height * 0.01,
+                            f'{time_val:.3f}s', ha='center', va='bottom', fontweight='bold')
+
+                ax.set_ylabel('Czas wykonania (s)', fontweight='bold')
+                ax.set_title(f'Operacja {operation}', fontweight='bold')
+                ax.set_yscale('log')
+                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                ax.grid(True, alpha=0.3, axis='y')
+
+        plt.tight_layout()
+        self._save_figure(f'performance_overview_{data_size}.png')
+        self._finish_figure(fig)
 
     def create_scalability_analysis(self):
+        import numpy as np
+        from testfiles.scaling import predict, TARGET_SIZES
+        plt = pyplot()
         fig, axes = plt.subplots(2, 2, figsize=(16, 12))
         fig.suptitle('Analiza skalowalności baz danych', fontsize=16, fontweight='bold')
 
@@ -114,8 +347,24 @@ class DatabaseBenchmarkVisualizer:
 
                 sizes = list(db_data.keys())
                 times = [db_data[size].get(operation, 0) for size in sizes]
-
-                if len(sizes) > 1 and any(times):
+                fit = self.scaling.get(db_name, {}).get(operation)
+
+                if fit is not None:
+                    ax.scatter(sizes, times, s=80, color=self.colors[db_name], alpha=0.8)
+                    # Dopasowanie przez mniej niż trzy rozmiary rysujemy tylko w zakresie pomiarów.
+                    fit_end = max(fit['sizes']) if fit['underdetermined'] else max(TARGET_SIZES)
+                    fit_sizes = np.logspace(np.log10(min(fit['sizes'])), np.log10(fit_end), 100)
+                    ax.loglog(fit_sizes, predict(fit, fit_sizes), linestyle='--', linewidth=2,
+                              label=f"{db_name} (n^{fit['exponent']:.2f}, {self._format_r_squared(fit)})",
+                              color=self.colors[db_name], alpha=0.8)
+                    if fit['extrapolated']:
+                        ax.scatter(list(fit['extrapolated']), list(fit['extrapolated'].values()), s=80,
+                                   facecolors='none', edgecolors=self.colors[db_name], linewidths=2)
+                        target = max(fit['extrapolated'])
+                        ax.annotate(f"{fit['extrapolated'][target]:.2f}s", (target, fit['extrapolated'][target]),
+                                    textcoords='offset points', xytext=(-10, 5), ha='right', fontsize=8,
+                                    color=self.colors[db_name])
+                elif len(sizes) > 1 and any(times):
                     ax.loglog(sizes, times, marker='o', linewidth=2, markersize=8,
                               label=db_name, color=self.colors[db_name], alpha=0.8)
                 elif sizes and times[0] > 0:
@@ -129,36 +378,19 @@ class DatabaseBenchmarkVisualizer:
             ax.grid(True, alpha=0.3)
 
         plt.tight_layout()
-        plt.savefig('scalability_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_figure('scalability_analysis.png')
+        self._finish_figure(fig)
 
     def create_performance_heatmap(self):
-        data_for_heatmap = []
+        import seaborn as sns
+        plt = pyplot()
+        crud_table = self.crud_table()
 
-        for db_name, db_data in self.results.items():
-            for size, ops in db_data.items():
-                for operation, time_val in ops.items():
-                    if operation in ['CREATE', 'READ', 'UPDATE', 'DELETE']:
-                        data_for_heatmap.append({
-                            'Database': db_name,
-                            'Operation': operation,
-                            'Time': time_val
-                        })
-
-        if not data_for_heatmap:
+        if crud_table.empty:
             print("Brak danych do utworzenia mapy cieplnej")
             return
 
-        df = pd.DataFrame(data_for_heatmap)
-
-        aggregated_df = df.groupby(['Database', 'Operation'])['Time'].mean().reset_index()
-
-        pivot_table = aggregated_df.pivot_table(
-            values='Time',
-            index='Database',
-            columns='Operation',
-            fill_value=0
-        )
+        pivot_table = crud_table.groupby(level='backend', observed=True).mean().rename_axis('Database')
 
         fig, ax = plt.subplots(figsize=(10, 6))
         sns.heatmap(pivot_table, annot=True, fmt='.4f', cmap='YlOrRd',
@@ -172,32 +404,23 @@ class DatabaseBenchmarkVisualizer:
         plt.xticks(rotation=0)
         plt.yticks(rotation=0)
         plt.tight_layout()
-        plt.savefig('performance_heatmap_by_operation.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_figure('performance_heatmap_by_operation.png')
+        self._finish_figure(fig)
 
     def create_comparative_radar_chart(self):
+        import numpy as np
+        plt = pyplot()
         operations = ['CREATE', 'READ', 'UPDATE', 'DELETE']
         angles = np.linspace(0, 2 * np.pi, len(operations), endpoint=False).tolist()
         angles += angles[:1]
 
         fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
 
-        for db_name, db_data in self.results.items():
-            if not db_data:
-                continue
-
-            avg_times = []
-            for operation in operations:
-                times = []
-                for size_data in db_data.values():
-                    if operation in size_data:
-                        times.append(size_data[operation])
-
-                if times:
-                    avg_times.append(1 / np.mean(times))
-                else:
-                    avg_times.append(0)
+        crud_table = self.crud_table()
+        rates = (1 / crud_table.groupby(level='backend', observed=True).mean()).replace(np.inf, 0)
 
+        for db_name, row in rates.iterrows():
+            avg_times = row[operations].tolist()
             if any(avg_times):
                 avg_times += avg_times[:1]
 
@@ -213,10 +436,12 @@ class DatabaseBenchmarkVisualizer:
         ax.grid(True)
 
         plt.tight_layout()
-        plt.savefig('comparative_radar_chart.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_figure('comparative_radar_chart.png')
+        self._finish_figure(fig)
 
     def create_performance_summary_table(self):
+        from testfiles.bootstrap import CONFIDENCE
+        plt = pyplot()
         fig, ax = plt.subplots(figsize=(14, 8))
         ax.axis('tight')
         ax.axis('off')
@@ -224,18 +449,20 @@ class DatabaseBenchmarkVisualizer:
         summary_data = []
         headers = ['Baza danych', 'Rozmiar danych', 'CREATE (s)', 'READ (s)', 'UPDATE (s)', 'DELETE (s)', 'Średnia (s)']
 
-        for db_name, db_data in self.results.items():
-            for size, ops in db_data.items():
-                row = [
-                    db_name,
-                    f"{size:,}",
-                    f"{ops.get('CREATE', 0):.4f}",
-                    f"{ops.get('READ', 0):.4f}",
-                    f"{ops.get('UPDATE', 0):.4f}",
-                    f"{ops.get('DELETE', 0):.4f}",
-                    f"{np.mean(list(ops.values())):.4f}"
-                ]
-                summary_data.append(row)
+        crud_table = self.crud_table()
+        crud_table['mean'] = crud_table[['CREATE', 'READ', 'UPDATE', 'DELETE']].mean(axis=1)
+
+        for (db_name, size), ops in crud_table.iterrows():
+            row = [
+                db_name,
+                f"{size:,}",
+                self._format_with_interval(db_name, size, 'CREATE', ops['CREATE']),
+                self._format_with_interval(db_name, size, 'READ', ops['READ']),
+                self._format_with_interval(db_name, size, 'UPDATE', ops['UPDATE']),
+                self._format_with_interval(db_name, size, 'DELETE', ops['DELETE']),
+                f"{ops['mean']:.4f}"
+            ]
+            summary_data.append(row)
 
         if summary_data:
             table = ax.table(cellText=summary_data, colLabels=headers,
@@ -248,78 +475,22 @@ class DatabaseBenchmarkVisualizer:
                 table[(0, i)].set_facecolor('#4CAF50')
                 table[(0, i)].set_text_props(weight='bold', color='white')
 
-        ax.set_title('Podsumowanie wyników testów wydajności',
+        ax.set_title(f'Podsumowanie wyników testów wydajności\n(przedziały ufności {CONFIDENCE:.0%}, bootstrap)',
                      fontsize=16, fontweight='bold', pad=20)
 
         plt.tight_layout()
-        plt.savefig('performance_summary_table.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_figure('performance_summary_table.png')
+        self._finish_figure(fig)
 
     def create_test_comparison_charts(self):
         if not self.results:
             print("Brak danych do analizy")
             return
 
-        test_names = [
-            'test_insert_book_genre',
-            'test_insert_user',
-            'test_insert_publisher_and_author',
-            'test_insert_order_and_return',
-            'test_insert_book_rating_group_by',
-            'test_insert_book_rating_join',
-            'test_get_order_with_book_and_author',
-            'test_get_average_book_rating_above',
-            'test_get_genre_book_counts_group_by',
-            'test_get_users_and_orders_join',
-            'test_update_genre_popularity',
-            'test_update_user_location',
-            'test_update_genre_popularity_group_by',
-            'test_update_user_with_order_join',
-            'test_delete_genre_by_id',
-            'test_delete_user_by_id',
-            'test_delete_books_with_few_ratings_group_by',
-            'test_delete_orders_with_user_join'
-        ]
+        test_names = TEST_NAMES
+        test_mapping = TEST_MAPPING
 
-        test_mapping = {
-            'test_insert_book_rating_group_by': {
-                'MongoDB': 'test_insert_book_rating_aggregation'
-            },
-            'test_insert_book_rating_join': {
-                'MongoDB': 'test_insert_book_rating_with_lookup'
-            },
-            'test_get_order_with_book_and_author': {
-                'MongoDB': 'test_get_order_with_book_and_author_lookup'
-            },
-            'test_get_average_book_rating_above': {
-                'MongoDB': 'test_get_average_book_rating_above_aggregation'
-            },
-            'test_get_genre_book_counts_group_by': {
-                'MongoDB': 'test_get_genre_book_counts_aggregation'
-            },
-            'test_get_users_and_orders_join': {
-                'MongoDB': 'test_get_users_and_orders_lookup'
-            },
-            'test_update_genre_popularity_group_by': {
-                'MongoDB': 'test_update_genre_popularity_aggregation'
-            },
-            'test_update_user_with_order_join': {
-                'MongoDB': 'test_update_user_with_order_lookup'
-            },
-            'test_delete_books_with_few_ratings_group_by': {
-                'MongoDB': 'test_delete_books_with_few_ratings_aggregation'
-            },
-            'test_delete_orders_with_user_join': {
-                'MongoDB': 'test_delete_orders_with_user_lookup'
-            }
-        }
-
-        # Pobierz dostępne rozmiary danych
-        data_sizes = set()
-        for db_data in self.results.values():
-            if db_data:
-                data_sizes.update(db_data.keys())
-        data_sizes = sorted(list(data_sizes))
+        data_sizes = self.data_sizes()
 
         print(f"Tworzenie wykresów dla {len(test_names)} testów i {len(data_sizes)} rozmiarów danych...")
 
@@ -329,10 +500,13 @@ class DatabaseBenchmarkVisualizer:
                 self._create_single_test_chart_by_size(test_name, data_size, test_mapping)
 
     def _create_single_test_chart_by_size(self, test_name, data_size, test_mapping):
+        import numpy as np
+        plt = pyplot()
         fig, ax = plt.subplots(figsize=(10, 6))
 
         db_names = []
         test_times = []
+        errors = []
         colors = []
 
         for db_name, db_data in self.results.items():
@@ -349,6 +523,7 @@ class DatabaseBenchmarkVisualizer:
                 if actual_test_name not in ['CREATE', 'READ', 'UPDATE', 'DELETE']:
                     db_names.append(db_name)
                     test_times.append(size_data[actual_test_name])
+                    errors.append(self._error_bar(db_name, data_size, actual_test_name, test_times[-1]))
                     colors.append(self.colors.get(db_name, f'C{len(colors)}'))
 
         if not db_names:
@@ -356,10 +531,11 @@ class DatabaseBenchmarkVisualizer:
             plt.close(fig)
             return
 
-        bars = ax.bar(db_names, test_times, color=colors, alpha=0.8)
+        bars = ax.bar(db_names, test_times, color=colors, alpha=0.8,
+                      yerr=np.array(errors).T, capsize=5, ecolor='black')
 
-        for bar, time_val in zip(bars, test_times):
-            height = bar.get_height()
+        for bar, time_val, (_, upper) in zip(bars, test_times, errors):
+            height = bar.get_height() + upper
             ax.text(bar.get_x() + bar.get_width() / 2., height + height * 0.01,
                     f'{time_val:.4f}s', ha='center', va='bottom', fontweight='bold')
 
@@ -372,12 +548,519 @@ class DatabaseBenchmarkVisualizer:
 
         plt.tight_layout()
 
-        safe_filename = "".join(c for c in test_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_filename = safe_filename.replace(' ', '_').lower()
+        self._save_figure(test_chart_filename(test_name, data_size))
+        plt.close(fig)
+
+    def has_distribution(self, test_names, data_size):
+        return any(len(db_details.get(data_size, {}).get('samples', {}).get(test_name, [])) > 1
+                   for db_details in self.details.values() for test_name in test_names)
+
+    def _create_latency_distribution_chart(self, test_name, data_size):
+        import numpy as np
+        plt = pyplot()
+        table = self.results_table()
+        names = {test_name, *TEST_MAPPING.get(test_name, {}).values()}
+        subset = table[table['test'].isin(names) & (table['size'] == data_size)]
+
+        latencies = {}
+        for db_name, group in subset.groupby('backend', observed=True, sort=False):
+            if len(group) > 1:
+                latencies[db_name] = np.sort(group['latency_ns'].to_numpy()) / 1e6
+        if not latencies:
+            print(f"⚠️ Brak próbek dla testu: {test_name} (rozmiar {data_size})")
+            return
+
+        fig, (ax_hist, ax_cdf, ax_hdr) = plt.subplots(1, 3, figsize=(20, 6))
+        fig.suptitle(f'Rozkład opóźnień: {test_name}\nRozmiar danych: {data_size:,}', fontsize=14, fontweight='bold')
+
+        low = min(values[0] for values in latencies.values())
+        high = max(values[-1] for values in latencies.values())
+        bins = np.geomspace(low, high, 30) if 0 < low < high else 30
+        max_count = max(len(values) for values in latencies.values())
+
+        for idx, (db_name, values) in enumerate(latencies.items()):
+            color = self.colors.get(db_name, f'C{idx}')
+            count = len(values)
+            quantiles = np.arange(count) / count
+
+            ax_hist.hist(values, bins=bins, histtype='step', linewidth=2, color=color, label=db_name)
+            ax_cdf.step(values, np.arange(1, count + 1) / count, where='post', linewidth=2, color=color, label=db_name)
+            # Wykres w stylu HDR: oś X to 1/(1-q), więc ogon rozkładu jest rozciągnięty logarytmicznie.
+            ax_hdr.plot(1 / (1 - quantiles), values, linewidth=2, color=color, label=db_name)
+
+        if isinstance(bins, np.ndarray):
+            ax_hist.set_xscale('log')
+        ax_hist.set_xlabel('Opóźnienie (ms)', fontweight='bold')
+        ax_hist.set_ylabel('Liczba próbek', fontweight='bold')
+        ax_hist.set_title('Histogram', fontweight='bold')
+
+        ax_cdf.set_xscale('log')
+        ax_cdf.set_xlabel('Opóźnienie (ms)', fontweight='bold')
+        ax_cdf.set_ylabel('Odsetek próbek', fontweight='bold')
+        ax_cdf.set_title('Dystrybuanta empiryczna', fontweight='bold')
+
+        ticks = [(1, '0%'), (2, '50%'), (10, '90%'), (100, '99%'), (1000, '99.9%'), (10000, '99.99%')]
+        ticks = [(position, label) for position, label in ticks if position <= max_count]
+        ax_hdr.set_xscale('log')
+        ax_hdr.set_xticks([position for position, _ in ticks])
+        ax_hdr.set_xticklabels([label for _, label in ticks])
+        ax_hdr.set_xlabel('Percentyl', fontweight='bold')
+        ax_hdr.set_ylabel('Opóźnienie (ms)', fontweight='bold')
+        ax_hdr.set_title('Spektrum percentyli', fontweight='bold')
+
+        for ax in (ax_hist, ax_cdf, ax_hdr):
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+
+        plt.tight_layout()
+        self._save_figure(test_chart_filename(test_name, data_size, prefix='latency'))
+        plt.close(fig)
+
+    def has_timeline(self, test_names, data_size):
+        return any(db_details.get(data_size, {}).get('duration')
+                   and len(db_details[data_size].get('offsets', {}).get(test_name, [])) > 1
+                   for db_details in self.details.values() for test_name in test_names)
+
+    def timeline(self, db_name, data_size, test_name, bucket=TIMELINE_BUCKET):
+        import numpy as np
+        import pandas as pd
+        size_details = self.details.get(db_name, {}).get(data_size, {})
+        offsets = size_details.get('offsets', {}).get(test_name, [])
+        samples = size_details.get('samples', {}).get(test_name, [])
+        if len(offsets) < 2 or len(offsets) != len(samples):
+            return None
+
+        frame = pd.DataFrame({'offset': offsets, 'latency': np.asarray(samples) * 1000})
+        grouped = frame.groupby(np.floor(frame['offset'] / bucket) * bucket)['latency']
+        return pd.DataFrame({
+            'ops_per_second': grouped.count() / bucket,
+            'p50': grouped.median(),
+            'p99': grouped.quantile(0.99),
+        })
+
+    def _create_timeline_chart(self, test_name, data_size):
+        plt = pyplot()
+        timelines = {}
+        for db_name in self.details:
+            actual_test_name = TEST_MAPPING.get(test_name, {}).get(db_name, test_name)
+            timeline = self.timeline(db_name, data_size, actual_test_name)
+            if timeline is not None:
+                timelines[db_name] = timeline
+        if not timelines:
+            print(f"⚠️ Brak danych przebiegu czasowego dla testu: {test_name} (rozmiar {data_size})")
+            return
+
+        fig, (ax_throughput, ax_latency) = plt.subplots(2, 1, figsize=(16, 10), sharex=True)
+        fig.suptitle(f'Przebieg w czasie: {test_name}\nRozmiar danych: {data_size:,}', fontsize=14, fontweight='bold')
+
+        for idx, (db_name, timeline) in enumerate(timelines.items()):
+            color = self.colors.get(db_name, f'C{idx}')
+            ax_throughput.plot(timeline.index, timeline['ops_per_second'], linewidth=2, color=color, label=db_name)
+            ax_latency.plot(timeline.index, timeline['p50'], linewidth=2, color=color, label=f'{db_name} p50')
+            ax_latency.plot(timeline.index, timeline['p99'], linewidth=1.5, linestyle='--', color=color,
+                            label=f'{db_name} p99')
+
+        ax_throughput.set_ylabel('Operacje/s', fontweight='bold')
+        ax_throughput.set_title(f'Przepustowość (okna {TIMELINE_BUCKET:g}s)', fontweight='bold')
+        ax_latency.set_ylabel('Opóźnienie (ms)', fontweight='bold')
+        ax_latency.set_xlabel('Czas od początku testu (s)', fontweight='bold')
+        ax_latency.set_title('Opóźnienie p50 / p99', fontweight='bold')
+        ax_latency.set_yscale('log')
+
+        for ax in (ax_throughput, ax_latency):
+            ax.grid(True, alpha=0.3)
+            ax.legend(ncol=2)
 
-        plt.savefig(f'test_{safe_filename}_size_{data_size}.png', dpi=300, bbox_inches='tight')
+        plt.tight_layout()
+        self._save_figure(test_chart_filename(test_name, data_size, prefix='timeline'))
         plt.close(fig)
 
+    def has_phases(self, test_names, data_size):
+        return any(test_name in db_details.get(data_size, {}).get('phases', {})
+                   for db_details in self.details.values() for test_name in test_names)
+
+    def _create_phase_breakdown_chart(self, test_name, data_size):
+        import numpy as np
+        plt = pyplot()
+        breakdowns = {}
+        for db_name in self.details:
+            actual_test_name = TEST_MAPPING.get(test_name, {}).get(db_name, test_name)
+            phases = self.latency_phases(db_name, data_size, actual_test_name)
+            if phases:
+                breakdowns[db_name] = phases
+        if not breakdowns:
+            print(f"⚠️ Brak podziału na fazy dla testu: {test_name} (rozmiar {data_size})")
+            return
+
+        fig, ax = plt.subplots(figsize=(14, 2 + 1.2 * len(breakdowns)))
+        positions = np.arange(len(breakdowns))
+        left = np.zeros(len(breakdowns))
+        for idx, phase in enumerate(LATENCY_PHASES):
+            values = np.array([phases.get(phase, 0.0) * 1000 for phases in breakdowns.values()])
+            ax.barh(positions, values, left=left, color=f'C{idx}', label=PHASE_LABELS[phase])
+            left += values
+
+        # Czas serwera (jeśli baza go raportuje) jest częścią wykonania, więc zaznaczamy go osobno.
+        server = [(position, phases['server'] * 1000) for position, phases in zip(positions, breakdowns.values())
+                  if 'server' in phases]
+        if server:
+            ax.scatter([value for _, value in server], [position for position, _ in server], marker='D',
+                       color='black', zorder=3, label='Czas wykonania na serwerze')
+
+        ax.set_yticks(positions)
+        ax.set_yticklabels(list(breakdowns))
+        ax.invert_yaxis()
+        ax.set_xlabel('Czas na operację (ms)', fontweight='bold')
+        ax.set_title(f'Podział opóźnienia na fazy: {test_name}\nRozmiar danych: {data_size:,}',
+                     fontsize=14, fontweight='bold')
+        ax.grid(True, axis='x', alpha=0.3)
+        ax.legend(loc='upper left', bbox_to_anchor=(1.01, 1), fontsize=9)
+
+        plt.tight_layout()
+        self._save_figure(test_chart_filename(test_name, data_size, prefix='phases'))
+        plt.close(fig)
+
+    def create_sweep_comparison(self, name):
+        import numpy as np
+        plt = pyplot()
+        sweep = self.sweeps.get(name)
+        if not sweep:
+            print(f"Brak danych dla serii {name}")
+            return
+
+        labels = list(sweep.keys())
+        db_names = [db_name for db_name in self.colors
+                    if any(entry['results'].get(db_name) for entry in sweep.values())]
+        data_sizes = sorted({size for entry in sweep.values()
+                             for db_data in entry['results'].values() for size in db_data})
+        width = 0.8 / len(labels)
+
+        for data_size in data_sizes:
+            fig, ax = plt.subplots(figsize=(12, 6))
+            x = np.arange(len(db_names))
+            for idx, label in enumerate(labels):
+                load_times = [sweep[label]['details'].get(db_name, {}).get(data_size, {}).get('load_time', 0)
+                              for db_name in db_names]
+                ax.bar(x + idx * width, load_times, width, label=label, alpha=0.8)
+
+            ax.set_xticks(x + width * (len(labels) - 1) / 2)
+            ax.set_xticklabels(db_names)
+            ax.set_ylabel('Czas ładowania danych (s)', fontweight='bold')
+            ax.set_title(f'Czas ładowania danych - seria {name}\nRozmiar danych: {data_size:,}',
+                         fontweight='bold')
+            ax.legend(title=name)
+            ax.grid(True, alpha=0.3, axis='y')
+
+            plt.tight_layout()
+            self._save_figure(f'sweep_{name}_load_time_{data_size}.png')
+            plt.close(fig)
+
+            for db_name in db_names:
+                test_names = sorted({test_name for entry in sweep.values()
+                                     for test_name in entry['results'].get(db_name, {}).get(data_size, {})
+                                     if test_name not in ['CREATE', 'READ', 'UPDATE', 'DELETE']})
+                if not test_names:
+                    continue
+
+                fig, ax = plt.subplots(figsize=(16, 8))
+                x = np.arange(len(test_names))
+                for idx, label in enumerate(labels):
+                    size_data = sweep[label]['results'].get(db_name, {}).get(data_size, {})
+                    times = [size_data.get(test_name, np.nan) for test_name in test_names]
+                    ax.bar(x + idx * width, times, width, label=label, alpha=0.8)
+
+                ax.set_xticks(x + width * (len(labels) - 1) / 2)
+                ax.set_xticklabels(test_names, rotation=60, ha='right')
+                ax.set_ylabel('Czas wykonania (s)', fontweight='bold')
+                ax.set_title(f'{db_name} - seria {name}\nRozmiar danych: {data_size:,}', fontweight='bold')
+                ax.set_yscale('log')
+                ax.legend(title=name)
+                ax.grid(True, alpha=0.3, axis='y')
+
+                plt.tight_layout()
+                self._save_figure(f'sweep_{name}_{db_name.lower()}_{data_size}.png')
+                plt.close(fig)
+
+    def print_sweep_summary(self, name):
+        sweep = self.sweeps.get(name)
+        if not sweep:
+            return
+
+        print("\n" + "=" * 60)
+        print(f"📊 PODSUMOWANIE SERII: {name}")
+        print("=" * 60)
+
+        baseline_label = next(iter(sweep))
+        for label, entry in sweep.items():
+            print(f"\n🔧 {label}:")
+            for db_name, db_data in entry['results'].items():
+                for size, ops in db_data.items():
+                    size_details = entry['details'].get(db_name, {}).get(size, {})
+                    load_time = size_details.get('load_time', 0)
+                    ingestion = size_details.get('ingestion_total', {}).get('rows_per_second', 0)
+                    crud = ", ".join(f"{op}: {ops.get(op, 0):.4f}s" for op in ['CREATE', 'READ', 'UPDATE', 'DELETE'])
+                    print(f"  {db_name} ({size:,}): ładowanie {load_time:.2f}s ({ingestion:.0f} wierszy/s) | {crud}")
+
+                    baseline = sweep[baseline_label]['results'].get(db_name, {}).get(size, {})
+                    for test_name, time_val in ops.items():
+                        if test_name in ['CREATE', 'READ', 'UPDATE', 'DELETE'] or time_val <= 0:
+                            continue
+                        change = ""
+                        if label != baseline_label and baseline.get(test_name):
+                            change = f" ({(time_val / baseline[test_name] - 1) * 100:+.1f}% vs {baseline_label})"
+                        failures = size_details.get('serialization_failures', {}).get(test_name, 0)
+                        retries = size_details.get('retries', {}).get(test_name, 0)
+                        if failures or retries:
+                            retry_time = size_details.get('retry_time', {}).get(test_name, 0.0)
+                            change += (f" | konflikty: {failures}, ponowienia: {retries} "
+                                       f"(poza pomiarem: {retry_time:.4f}s)")
+                        print(f"    {test_name:50} {time_val:.4f}s  {1 / time_val:8.1f} op/s{change}")
+
+    def create_ingestion_charts(self):
+        import numpy as np
+        plt = pyplot()
+        data_sizes = sorted({size for db_details in self.details.values() for size in db_details})
+
+        for data_size in data_sizes:
+            db_names = [db_name for db_name in self.colors
+                        if 'ingestion_total' in self.details.get(db_name, {}).get(data_size, {})]
+            if not db_names:
+                continue
+
+            totals = [self.details[db_name][data_size]['ingestion_total'] for db_name in db_names]
+            colors = [self.colors[db_name] for db_name in db_names]
+
+            fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+            fig.suptitle(f'Ładowanie danych - rozmiar danych: {data_size:,}', fontsize=16, fontweight='bold')
+
+            axes[0, 0].bar(db_names, [total['rows_per_second'] for total in totals], color=colors, alpha=0.8)
+            axes[0, 0].set_ylabel('Wiersze/s', fontweight='bold')
+            axes[0, 0].set_title('Przepustowość ładowania', fontweight='bold')
+
+            axes[0, 1].bar(db_names, [total['bytes'] / 1024 / 1024 for total in totals], color=colors, alpha=0.8)
+            axes[0, 1].set_ylabel('MiB', fontweight='bold')
+            axes[0, 1].set_title('Rozmiar załadowanych danych', fontweight='bold')
+
+            axes[1, 0].bar(db_names, [total['commits'] for total in totals], color=colors, alpha=0.8)
+            axes[1, 0].set_ylabel('Liczba zatwierdzeń', fontweight='bold')
+            axes[1, 0].set_title('Zatwierdzenia podczas ładowania', fontweight='bold')
+
+            x = np.arange(len(db_names))
+            crud_totals = [sum(self.results.get(db_name, {}).get(data_size, {}).get(op, 0)
+                               for op in ['CREATE', 'READ', 'UPDATE', 'DELETE'])
+                           for db_name in db_names]
+            axes[1, 1].bar(x - 0.2, [total['seconds'] for total in totals], 0.4, label='Ładowanie', alpha=0.8)
+            axes[1, 1].bar(x + 0.2, crud_totals, 0.4, label='CRUD (suma)', alpha=0.8)
+            axes[1, 1].set_xticks(x)
+            axes[1, 1].set_xticklabels(db_names)
+            axes[1, 1].set_ylabel('Czas (s)', fontweight='bold')
+            axes[1, 1].set_title('Ładowanie a operacje CRUD', fontweight='bold')
+            axes[1, 1].legend()
+
+            for ax in axes.flat:
+                ax.grid(True, alpha=0.3, axis='y')
+
+            plt.tight_layout()
+            self._save_figure(f'ingestion_overview_{data_size}.png')
+            plt.close(fig)
+
+    def create_batch_sweep_charts(self):
+        import numpy as np
+        plt = pyplot()
+        db_names = [db_name for db_name in self.colors if self.batch_sweep.get(db_name)]
+        if not db_names:
+            print("Brak danych serii rozmiarów partii")
+            return
+
+        metrics = [
+            ('rows_per_second', 'Przepustowość (wiersze/s)', 1, 'throughput'),
+            ('batch_latency_avg', 'Średni czas partii (ms)', 1000, 'latency'),
+            ('peak_memory', 'Szczyt pamięci (KiB, osobny przebieg z tracemalloc)', 1 / 1024, 'memory'),
+        ]
+
+        for metric, ylabel, scale, suffix in metrics:
+            fig, axes = plt.subplots(1, len(db_names), figsize=(6 * len(db_names), 5), squeeze=False)
+            for ax, db_name in zip(axes[0], db_names):
+                sweep = self.batch_sweep[db_name]
+                batch_sizes = sorted(sweep)
+                tables = sorted({table for stats in sweep.values() for table in stats})
+                for table in tables:
+                    values = [sweep[batch_size].get(table, {}).get(metric, np.nan) * scale
+                              for batch_size in batch_sizes]
+                    ax.plot(batch_sizes, values, marker='o', label=table)
+
+                ax.set_xscale('log')
+                ax.set_xlabel('Rozmiar partii', fontweight='bold')
+                ax.set_ylabel(ylabel, fontweight='bold')
+                ax.set_title(db_name, fontweight='bold', color=self.colors[db_name])
+                ax.grid(True, alpha=0.3)
+                ax.legend(fontsize=8)
+
+            fig.suptitle(f'Seria rozmiarów partii - {ylabel}', fontsize=14, fontweight='bold')
+            plt.tight_layout()
+            self._save_figure(f'batch_sweep_{suffix}.png')
+            plt.close(fig)
+
+    def print_batch_sweep_summary(self):
+        print("\n" + "=" * 60)
+        print("📊 PODSUMOWANIE SERII ROZMIARÓW PARTII")
+        print("=" * 60)
+
+        for db_name, sweep in self.batch_sweep.items():
+            if not sweep:
+                continue
+            print(f"\n🔹 {db_name}:")
+            tables = sorted({table for stats in sweep.values() for table in stats})
+            for table in tables:
+                throughput = {batch_size: stats[table]['rows_per_second']
+                              for batch_size, stats in sweep.items() if table in stats}
+                best = max(throughput, key=throughput.get)
+                values = ", ".join(f"{batch_size}: {rate:.0f}/s" for batch_size, rate in sorted(throughput.items()))
+                print(f"  {table:15} najlepszy rozmiar partii {best} | {values}")
+                retries = {batch_size: stats[table].get('retries', 0) for batch_size, stats in sweep.items()
+                           if stats.get(table, {}).get('retries')}
+                if retries:
+                    print(f"  {'':15} ponowienia niezapisanych elementów | "
+                          + ", ".join(f"{batch_size}: {count}" for batch_size, count in sorted(retries.items())))
+
+    def print_runs(self, limit=20):
+        runs = list_runs(self.store_path, limit)
+        if not runs:
+            print(f"Brak zapisanych przebiegów w {self.store_path}")
+            return
+
+        print(f"\n📚 Ostatnie przebiegi ({self.store_path}):")
+        for run in runs:
+            revision = (run['git_revision'] or '-')[:10]
+            backends = ", ".join(f"{db_name} {versions.get('server') or '?'}"
+                                 for db_name, versions in run['backend_versions'].items())
+            print(f"  {run['run_id']}  {run['started_at']}  {revision}  {json.dumps(run['config'])}  {backends}")
+
+    def run_comparison(self, candidate_id=None, baseline_id=None, window=1, alpha=0.05, threshold=0.10):
+        from testfiles.regression import compare_runs
+        runs = list_runs(self.store_path)
+        if not runs:
+            print(f"Brak zapisanych przebiegów w {self.store_path}")
+            return 0
+
+        run_ids = [run['run_id'] for run in runs]
+        candidate_id = candidate_id or run_ids[0]
+        if candidate_id not in run_ids:
+            raise KeyError(f"Nie znaleziono przebiegu {candidate_id}")
+        candidate = load_run(candidate_id, self.store_path)
+
+        if baseline_id:
+            baseline_ids = [baseline_id]
+        else:
+            older = runs[run_ids.index(candidate_id) + 1:]
+            baseline_ids = [run['run_id'] for run in older if run['config'] == candidate['config']][:window]
+        if not baseline_ids:
+            print(f"Brak przebiegu bazowego dla {candidate_id}")
+            return 0
+        baselines = [load_run(run_id, self.store_path) for run_id in baseline_ids]
+
+        findings = compare_runs(baselines, candidate, alpha, threshold)
+
+        print("\n" + "=" * 60)
+        print(f"🔍 PORÓWNANIE {candidate_id} z {', '.join(baseline_ids)}")
+        print(f"   próg zmiany {threshold * 100:.0f}%, poziom istotności {alpha}")
+        print("=" * 60)
+
+        markers = {'regression': '❌', 'improvement': '✅', 'ok': '  '}
+        for finding in findings:
+            print(f"{markers[finding['status']]} {finding['backend']:12} {finding['data_size']:>9,} "
+                  f"{finding['test_name']:50} {finding['baseline_median']:.4f}s → {finding['candidate_median']:.4f}s "
+                  f"({finding['change'] * 100:+.1f}%, p={finding['p_value']:.4f})")
+
+        regressions = [finding for finding in findings if finding['status'] == 'regression']
+        improvements = [finding for finding in findings if finding['status'] == 'improvement']
+        print(f"\nRegresje: {len(regressions)}, poprawy: {len(improvements)}, porównane testy: {len(findings)}")
+        return len(regressions)
+
+    def load_stored_run(self, run_id=None):
+        if run_id is None:
+            runs = list_runs(self.store_path, limit=1)
+            if not runs:
+                raise KeyError(f"Brak zapisanych przebiegów w {self.store_path}")
+            run_id = runs[0]['run_id']
+        run = load_run(run_id, self.store_path)
+        self.results, self.details, self.run_id = run['results'], run['details'], run['run_id']
+        self._table = None
+        return run
+
+    def create_html_report(self, run_id=None, path=DEFAULT_REPORT_PATH):
+        from testfiles.frame import test_summary
+        from testfiles.report import build_report
+
+        run = self.load_stored_run(run_id)
+        print(f"📝 Tworzenie raportu HTML dla przebiegu {self.run_id}...")
+        self.compute_confidence_intervals()
+        self.compute_scaling_models()
+
+        output_dir, dpi = self.output_dir, self.dpi
+        self.output_dir, self.dpi = os.path.join(output_dir, REPORT_CHART_DIR), REPORT_DPI
+        try:
+            self.render_charts(self.chart_jobs())
+            charts = {}
+            for filename in self.chart_files:
+                with open(os.path.join(self.output_dir, filename), 'rb') as f:
+                    charts[filename] = f.read()
+        finally:
+            self.output_dir, self.dpi = output_dir, dpi
+
+        operations = ['CREATE', 'READ', 'UPDATE', 'DELETE']
+        crud_table = self.crud_table()
+        summary_rows = []
+        for (db_name, size), ops in crud_table.iterrows():
+            summary_rows.append([db_name, (f"{size:,}", size)]
+                                + [(self._format_with_interval(db_name, size, op, ops[op]), ops[op]) for op in operations]
+                                + [(f"{ops[operations].mean():.4f}", ops[operations].mean())])
+
+        summary = test_summary(self.results_table())
+        test_headers = ['Baza danych', 'Rozmiar danych', 'Średnia (s)', 'p50 (s)', 'p95 (s)', 'Próbki', 'Metryki',
+                        'Fazy (na operację)', 'Statystyki serwera (na operację)', 'Ostrzeżenia planu']
+        test_sections = []
+        for test_name in TEST_NAMES:
+            rows = []
+            plans = []
+            for (db_name, size, actual_test_name), entry in summary.iterrows():
+                if TEST_MAPPING.get(test_name, {}).get(db_name, test_name) != actual_test_name:
+                    continue
+                plan = self.query_plan(db_name, size, actual_test_name) or {}
+                if plan:
+                    plans.append((f"{db_name}, rozmiar {size:,}", plan))
+                rows.append([db_name, (f"{size:,}", size),
+                             (self._format_with_interval(db_name, size, actual_test_name, entry['mean']), entry['mean']),
+                             (f"{entry['p50']:.4f}", entry['p50']), (f"{entry['p95']:.4f}", entry['p95']),
+                             int(entry['samples']), self._format_metrics(db_name, size, actual_test_name).lstrip(' |'),
+                             self._format_phases(self.latency_phases(db_name, size, actual_test_name)),
+                             self._format_server_stats(self.server_stats(db_name, size, actual_test_name)),
+                             "; ".join(plan.get('warnings', []))])
+            test_charts = [(filename, charts[filename]) for size in self.data_sizes() for filename in
+                           (test_chart_filename(test_name, size), test_chart_filename(test_name, size, 'latency'),
+                            test_chart_filename(test_name, size, 'timeline'),
+                            test_chart_filename(test_name, size, 'phases'))
+                           if filename in charts]
+            if rows:
+                test_sections.append((test_name, test_headers, rows, test_charts, plans))
+
+        def select(*prefixes):
+            return [(filename, data) for filename, data in charts.items() if filename.startswith(prefixes)]
+
+        chart_sections = [
+            ('Przegląd wydajności', select('performance_', 'comparative_', 'scalability_')),
+            ('Ładowanie danych', select('ingestion_')),
+            ('Metryki przepustowości i kosztu', select('metric_')),
+        ]
+
+        metadata = {key: value for key, value in run.items() if key not in ('results', 'details')}
+        report = build_report(metadata, ['Baza danych', 'Rozmiar danych'] + [f"{op} (s)" for op in operations]
+                              + ['Średnia (s)'], summary_rows, test_sections, chart_sections)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"✅ Raport zapisany w {path} ({len(report) / 1024 / 1024:.1f} MiB, {len(charts)} wykresów)")
+        return path
+
     def debug_available_tests(self):
         print("\n=== DEBUGOWANIE DOSTĘPNYCH TESTÓW ===")
         for db_name, db_data in self.results.items():
@@ -401,115 +1084,480 @@ class DatabaseBenchmarkVisualizer:
                                         if key not in ['CREATE', 'READ', 'UPDATE', 'DELETE']]
                     if individual_tests:
                         for test_name in sorted(individual_tests):
-                            print(f"    ✅ {test_name}: {size_data[test_name]:.4f}s")
+                            formatted = self._format_with_interval(db_name, size, test_name, size_data[test_name])
+                            print(f"    ✅ {test_name}: {formatted}s")
                     else:
                         print("    ❌ Brak danych poszczególnych testów")
             else:
                 print("  ❌ Brak danych")
 
-    def generate_all_charts(self):
-        self.debug_available_tests()
-        self.debug_individual_tests()
+    def _save_figure(self, filename):
+        plt = pyplot()
+        os.makedirs(self.output_dir, exist_ok=True)
+        plt.savefig(os.path.join(self.output_dir, filename), dpi=self.dpi, bbox_inches='tight')
+        self.saved_files.append(filename)
+
+    def _finish_figure(self, fig):
+        plt = pyplot()
+        if not self.show:
+            plt.close(fig)
+
+    def metric_value(self, db_name, data_size, key, metric='seconds'):
+        if metric == 'seconds':
+            return self.results.get(db_name, {}).get(data_size, {}).get(key)
+        size_details = self.details.get(db_name, {}).get(data_size, {})
+        return size_details.get('metrics', {}).get(key, {}).get(metric)
+
+    def create_metric_charts(self, metric):
+        import numpy as np
+        plt = pyplot()
+        data_sizes = sorted({size for db_data in self.results.values() for size in db_data})
+        keys = ['CREATE', 'READ', 'UPDATE', 'DELETE'] + TEST_NAMES
+
+        for data_size in data_sizes:
+            values = {}
+            for db_name in self.results:
+                db_values = []
+                for key in keys:
+                    actual_key = TEST_MAPPING.get(key, {}).get(db_name, key)
+                    value = self.metric_value(db_name, data_size, actual_key, metric)
+                    db_values.append(np.nan if value is None else value)
+                if not np.all(np.isnan(db_values)):
+                    values[db_name] = db_values
+            if not values:
+                continue
+
+            fig, ax = plt.subplots(figsize=(20, 8))
+            x = np.arange(len(keys))
+            width = 0.8 / len(values)
+            for idx, (db_name, db_values) in enumerate(values.items()):
+                ax.bar(x + idx * width, db_values, width, label=db_name,
+                       color=self.colors.get(db_name, f'C{idx}'), alpha=0.8)
+
+            ax.set_xticks(x + width * (len(values) - 1) / 2)
+            ax.set_xticklabels(keys, rotation=60, ha='right')
+            ax.set_ylabel(METRICS[metric], fontweight='bold')
+            ax.set_title(f'{METRICS[metric]}\nRozmiar danych: {data_size:,}', fontweight='bold')
+            if np.nanmin([np.nanmin(db_values) for db_values in values.values()]) > 0:
+                ax.set_yscale('log')
+            ax.legend()
+            ax.grid(True, alpha=0.3, axis='y')
 
-        print("Tworzenie wykresów wydajności dla każdego rozmiaru danych...")
-        self.create_performance_overview_by_dataset()
+            plt.tight_layout()
+            self._save_figure(f'metric_{metric}_{data_size}.png')
+            plt.close(fig)
+
+    def _format_metrics(self, db_name, data_size, key):
+        parts = []
+        for metric, label in [('ops_per_second', 'op/s'), ('rows_per_second', 'wierszy/s'),
+                              ('read_capacity_units', 'RCU'), ('write_capacity_units', 'WCU')]:
+            value = self.metric_value(db_name, data_size, key, metric)
+            if value is not None:
+                parts.append(f"{value:.2f} {label}")
+        return f" | {', '.join(parts)}" if parts else ""
+
+    def server_stats(self, db_name, data_size, test_name):
+        return self.details.get(db_name, {}).get(data_size, {}).get('server_stats', {}).get(test_name, {})
+
+    def query_plan(self, db_name, data_size, test_name):
+        return self.details.get(db_name, {}).get(data_size, {}).get('plans', {}).get(test_name)
+
+    def latency_phases(self, db_name, data_size, test_name):
+        return self.details.get(db_name, {}).get(data_size, {}).get('phases', {}).get(test_name, {})
+
+    def _format_phases(self, phases):
+        text = ", ".join(f"{phase} {phases[phase] * 1000:.2f}ms" for phase in LATENCY_PHASES if phase in phases)
+        if 'server' in phases:
+            text += f" (w tym serwer {phases['server'] * 1000:.2f}ms)"
+        return text
+
+    def _format_server_stats(self, stats):
+        return ", ".join(f"{name}={value}" if isinstance(value, str) else f"{name}={value:g}"
+                         for name, value in stats.items() if value)
+
+    def available_metrics(self):
+        metrics = ['seconds'] if self.results else []
+        for db_details in self.details.values():
+            for size_details in db_details.values():
+                for entry in size_details.get('metrics', {}).values():
+                    metrics.extend(name for name in entry if name not in metrics)
+        return [metric for metric in METRICS if metric in metrics]
+
+    def compute_scaling_models(self):
+        from testfiles.scaling import fit_scaling_models
+        self.scaling = fit_scaling_models(self.results)
+
+    def print_scaling_summary(self):
+        from testfiles.scaling import SUPERLINEAR_EXPONENT
+        if not self.scaling:
+            return
 
-        print("Tworzenie wykresów średnich czasów dla każdego z 18 testów...")
-        self.create_test_comparison_charts()
+        print("\n📐 Model skalowania t = c·n^b (dopasowanie w skali logarytmicznej):")
+        for db_name, models in self.scaling.items():
+            print(f"\n🔹 {db_name}:")
+            for key, fit in models.items():
+                marker = "⚠️" if fit['exponent'] > SUPERLINEAR_EXPONENT else "  "
+                extrapolated = (", ".join(f"{size:,}: {time_val:.4f}s" for size, time_val in fit['extrapolated'].items())
+                                or "bez ekstrapolacji")
+                print(f"  {marker} {key:50} b={fit['exponent']:.3f} c={fit['constant']:.3e} "
+                      f"{self._format_r_squared(fit)} | {extrapolated}")
+
+    def _format_r_squared(self, fit):
+        if fit.get('r_squared') is None:
+            return f"R² n/d: {len(fit['sizes'])} rozmiary"
+        return f"R²={fit['r_squared']:.3f}"
+
+    def compute_confidence_intervals(self):
+        from testfiles.bootstrap import size_confidence_intervals
+        self.confidence = {
+            db_name: {size: size_confidence_intervals(size_details) for size, size_details in db_details.items()}
+            for db_name, db_details in self.details.items()
+        }
 
-        print("Analiza skalowalności...")
-        self.create_scalability_analysis()
+    def _interval(self, db_name, data_size, key):
+        return self.confidence.get(db_name, {}).get(data_size, {}).get(key)
+
+    def _error_bar(self, db_name, data_size, key, value):
+        interval = self._interval(db_name, data_size, key)
+        if interval is None:
+            return 0.0, 0.0
+        low, high = interval
+        return max(value - low, 0.0), max(high - value, 0.0)
+
+    def _format_with_interval(self, db_name, data_size, key, value):
+        interval = self._interval(db_name, data_size, key)
+        if interval is None:
+            return f"{value:.4f}"
+        return f"{value:.4f} [{interval[0]:.4f}–{interval[1]:.4f}]"
+
+    def results_table(self):
+        from testfiles.frame import results_frame
+        if self._table is None:
+            self._table = results_frame(self.results, self.details)
+        return self._table
+
+    def crud_table(self):
+        from testfiles.frame import crud_totals
+        return crud_totals(self.results_table())
+
+    def data_sizes(self):
+        return sorted({size for db_data in self.results.values() if db_data for size in db_data})
+
+    def chart_state(self, data_size=None, keys=None, detail_keys=(), scaling=False):
+        def select(tree):
+            return {db_name: {size: {key: value for key, value in size_data.items() if keys is None or key in keys}
+                              for size, size_data in db_data.items() if data_size is None or size == data_size}
+                    for db_name, db_data in tree.items()}
+
+        def select_detail(key, value):
+            # Próbki i ich znaczniki czasu są indeksowane nazwą testu, więc zawężamy je tak jak wyniki.
+            if key in ('samples', 'offsets', 'phases') and keys is not None:
+                return {test_name: times for test_name, times in value.items() if test_name in keys}
+            return value
+
+        return {
+            'results': select(self.results),
+            'confidence': select(self.confidence),
+            'details': {db_name: {size: {key: select_detail(key, size_details[key])
+                                         for key in detail_keys if key in size_details}
+                                  for size, size_details in db_details.items()
+                                  if data_size is None or size == data_size}
+                        for db_name, db_details in self.details.items()},
+            'scaling': self.scaling if scaling else {},
+        }
 
-        print("Mapa cieplna wydajności...")
-        self.create_performance_heatmap()
+    def chart_jobs(self):
+        jobs = []
+        for data_size in self.data_sizes():
+            jobs.append(('_create_performance_overview_for_size', self.chart_state(data_size), (data_size,)))
+
+        for test_name in TEST_NAMES:
+            keys = {test_name, *TEST_MAPPING.get(test_name, {}).values()}
+            for data_size in self.data_sizes():
+                jobs.append(('_create_single_test_chart_by_size', self.chart_state(data_size, keys),
+                             (test_name, data_size, TEST_MAPPING)))
+                if self.has_distribution(keys, data_size):
+                    jobs.append(('_create_latency_distribution_chart',
+                                 self.chart_state(data_size, keys, detail_keys=('samples', 'crud_categories')),
+                                 (test_name, data_size)))
+                if self.has_timeline(keys, data_size):
+                    jobs.append(('_create_timeline_chart',
+                                 self.chart_state(data_size, keys, detail_keys=('samples', 'offsets')),
+                                 (test_name, data_size)))
+                if self.has_phases(keys, data_size):
+                    jobs.append(('_create_phase_breakdown_chart',
+                                 self.chart_state(data_size, keys, detail_keys=('phases',)),
+                                 (test_name, data_size)))
+
+        jobs.append(('create_scalability_analysis', self.chart_state(scaling=True), ()))
+        jobs.append(('create_performance_heatmap', self.chart_state(), ()))
+        jobs.append(('create_comparative_radar_chart', self.chart_state(), ()))
+        jobs.append(('create_performance_summary_table', self.chart_state(), ()))
+        jobs.append(('create_ingestion_charts', self.chart_state(detail_keys=('ingestion_total',)), ()))
+
+        for metric in self.available_metrics():
+            if metric != 'seconds':
+                jobs.append(('create_metric_charts', self.chart_state(detail_keys=('metrics',)), (metric,)))
+        return jobs
+
+    def chart_hash(self, method_name, state, args):
+        payload = json.dumps([method_name, chart_source_hash(method_name), CHART_CODE_VERSION, list(args), state,
+                              self.colors, self.crud_colors, self.dpi],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load_chart_manifest(self):
+        try:
+            with open(os.path.join(self.output_dir, CHART_MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_chart_manifest(self, manifest):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, CHART_MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    def _is_up_to_date(self, entry, digest):
+        return (entry is not None and entry['hash'] == digest
+                and all(os.path.exists(os.path.join(self.output_dir, filename)) for filename in entry['files']))
+
+    def render_charts(self, jobs):
+        manifest = self.load_chart_manifest()
+        keys = []
+        pending = []
+        for method_name, state, args in jobs:
+            key = json.dumps([method_name, list(args)], default=str)
+            digest = self.chart_hash(method_name, state, args)
+            keys.append(key)
+            # Przy --show wykresy mają trafić na ekran, więc nie korzystamy z gotowych plików.
+            if self.force_charts or self.show or not self._is_up_to_date(manifest.get(key), digest):
+                manifest.pop(key, None)
+                pending.append((key, digest, method_name, state, args))
+
+        print(f"Wykresy aktualne: {len(jobs) - len(pending)}, do narysowania: {len(pending)}")
+
+        # Okna wykresów muszą powstać w tym procesie, więc przy --show rysujemy sekwencyjnie.
+        if self.show or self.workers <= 1 or len(pending) <= 1:
+            for key, digest, method_name, _, args in pending:
+                self.saved_files = []
+                getattr(self, method_name)(*args)
+                manifest[key] = {'hash': digest, 'files': self.saved_files}
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(render_chart, method_name, state, args, self.output_dir, self.dpi): (key, digest)
+                           for key, digest, method_name, state, args in pending}
+                for future in as_completed(futures):
+                    key, digest = futures[future]
+                    try:
+                        manifest[key] = {'hash': digest, 'files': future.result()}
+                    except Exception as e:
+                        print(f"❌ Błąd podczas tworzenia wykresu ({key}): {e}")
+
+        self.save_chart_manifest(manifest)
+        self.chart_files = [filename for key in keys for filename in manifest.get(key, {}).get('files', [])]
 
-        print("Wykres radarowy...")
-        self.create_comparative_radar_chart()
+    def generate_all_charts(self):
+        self._table = None
+        self.compute_confidence_intervals()
+        self.compute_scaling_models()
+        self.debug_available_tests()
+        self.debug_individual_tests()
 
-        print("Tabela podsumowująca...")
-        self.create_performance_summary_table()
+        jobs = self.chart_jobs()
+        print(f"Tworzenie {len(jobs)} wykresów ({self.workers} procesów)...")
+        started = time.perf_counter()
+        self.render_charts(jobs)
 
-        print("✅ Wszystkie wykresy zostały wygenerowane!")
+        print(f"✅ Wszystkie wykresy zostały wygenerowane w {time.perf_counter() - started:.1f}s!")
         self.print_summary()
+        self.print_scaling_summary()
+
+        if self.show:
+            pyplot().show()
 
     def print_summary(self):
         print("\n" + "=" * 60)
         print("📊 PODSUMOWANIE TESTÓW WYDAJNOŚCI BAZ DANYCH")
         print("=" * 60)
 
-        for db_name, db_data in self.results.items():
-            if db_data:
-                print(f"\n🔹 {db_name}:")
-                for size, ops in db_data.items():
-                    if isinstance(ops, dict) and ops:
-                        crud_ops = {k: v for k, v in ops.items() if k in ['CREATE', 'READ', 'UPDATE', 'DELETE']}
-                        if crud_ops:
-                            avg_time = np.mean(list(crud_ops.values()))
-                            print(f"  Rozmiar {size:,}: średni czas {avg_time:.4f}s")
-                            for op, time_val in crud_ops.items():
-                                print(f"    {op}: {time_val:.4f}s")
-
-        test_names = [
-            'test_insert_book_genre', 'test_insert_user', 'test_insert_publisher_and_author',
-            'test_insert_order_and_return', 'test_insert_book_rating_group_by', 'test_insert_book_rating_join',
-            'test_get_order_with_book_and_author', 'test_get_average_book_rating_above',
-            'test_get_genre_book_counts_group_by', 'test_get_users_and_orders_join',
-            'test_update_genre_popularity', 'test_update_user_location',
-            'test_update_genre_popularity_group_by', 'test_update_user_with_order_join',
-            'test_delete_genre_by_id', 'test_delete_user_by_id',
-            'test_delete_books_with_few_ratings_group_by', 'test_delete_orders_with_user_join'
-        ]
+        crud_table = self.crud_table()
+        averages = crud_table.mean(axis=1)
+        for db_name in crud_table.index.unique(level='backend'):
+            print(f"\n🔹 {db_name}:")
+            for size, ops in crud_table.loc[db_name].iterrows():
+                print(f"  Rozmiar {size:,}: średni czas {averages[(db_name, size)]:.4f}s")
+                for op, time_val in ops.items():
+                    print(f"    {op}: {self._format_with_interval(db_name, size, op, time_val)}s"
+                          f"{self._format_metrics(db_name, size, op)}")
+
+        for db_name, db_details in self.details.items():
+            for size, size_details in db_details.items():
+                if 'ingestion' in size_details:
+                    total = size_details['ingestion_total']
+                    print(f"\n📥 Ładowanie {db_name} (rozmiar {size:,}): {total['rows_per_second']:.1f} wierszy/s, "
+                          f"{total['bytes'] / 1024 / 1024:.2f} MiB, {total['commits']} zatwierdzeń")
+                    for table, entry in size_details['ingestion'].items():
+                        print(f"    {table:15} {entry['rows_per_second']:10.1f} wierszy/s  "
+                              f"{entry['bytes'] / 1024:10.1f} KiB  {entry['commits']} zatwierdzeń")
+                if 'indexes' in size_details:
+                    print(f"\n🗂️ Indeksy {db_name} (rozmiar {size:,}):")
+                    for collection, indexes in size_details['indexes'].items():
+                        print(f"    {collection}: {', '.join(indexes)}")
+                for test_name, plan in size_details.get('plans', {}).items():
+                    for warning in plan['warnings']:
+                        print(f"\n⚠️ Plan {db_name} (rozmiar {size:,}) {test_name}: {warning}")
+                if size_details.get('phases'):
+                    connect_time = size_details.get('connect_time')
+                    connect = f", połączenie {connect_time * 1000:.1f}ms" if connect_time is not None else ""
+                    print(f"\n⏱️ Fazy opóźnienia {db_name} (rozmiar {size:,}, na operację{connect}):")
+                    for test_name, phases in size_details['phases'].items():
+                        print(f"    {test_name:50} {self._format_phases(phases)}")
+                if size_details.get('server_stats'):
+                    print(f"\n🖥️ Statystyki serwera {db_name} (rozmiar {size:,}, na operację):")
+                    for test_name, stats in size_details['server_stats'].items():
+                        print(f"    {test_name:50} {self._format_server_stats(stats)}")
+
+        print(f"\n📁 Wykresy zapisane w katalogu {self.output_dir}:")
+        for chart in self.chart_files:
+            print(f"  ✓ {chart}")
 
-        charts = []
 
-        data_sizes = set()
-        for db_data in self.results.values():
-            if db_data:
-                data_sizes.update(db_data.keys())
-        data_sizes = sorted(list(data_sizes))
+def test_chart_filename(test_name, data_size, prefix='test'):
+    safe_filename = "".join(c for c in test_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    safe_filename = safe_filename.replace(' ', '_').lower()
+    return f'{prefix}_{safe_filename}_size_{data_size}.png'
 
-        for size in data_sizes:
-            charts.append(f"performance_overview_{size}.png")
 
-        for test_name in test_names:
-            safe_filename = "".join(c for c in test_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_filename = safe_filename.replace(' ', '_').lower()
-            for size in data_sizes:
-                charts.append(f"test_{safe_filename}_size_{size}.png")
-
-        charts.extend([
-            "scalability_analysis.png",
-            "performance_heatmap.png",
-            "comparative_radar_chart.png",
-            "performance_summary_table.png"
-        ])
-
-        print(f"\n📁 Wykresy zapisane w bieżącym katalogu:")
-        for chart in charts:
-            print(f"  ✓ {chart}")
+@functools.lru_cache(maxsize=None)
+def chart_source_hash(method_name):
+    # Zmiana kodu metody wykresu unieważnia zapisany plik tak samo jak zmiana danych.
+    try:
+        source = inspect.getsource(getattr(DatabaseBenchmarkVisualizer, method_name))
+    except (OSError, TypeError):
+        return None
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def render_chart(method_name, state, args, output_dir='.', dpi=CHART_DPI):
+    visualizer = DatabaseBenchmarkVisualizer(workers=1, output_dir=output_dir)
+    visualizer.dpi = dpi
+    for name, value in state.items():
+        setattr(visualizer, name, value)
+    getattr(visualizer, method_name)(*args)
+    return visualizer.saved_files
+
+
+def backend_list(value):
+    try:
+        return parse_backends(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Tester wydajności baz danych")
+    parser.add_argument('--index-matrix', action='store_true',
+                        help="uruchom testy dla zestawów indeksów none/primary/full")
+    parser.add_argument('--durability-sweep', action='store_true',
+                        help="uruchom testy dla różnych ustawień trwałości zapisu")
+    parser.add_argument('--isolation-sweep', action='store_true',
+                        help="uruchom testy SQL dla poziomów izolacji transakcji")
+    parser.add_argument('--batch-sweep', action='store_true',
+                        help="zmierz ładowanie danych dla różnych rozmiarów partii")
+    parser.add_argument('--duration', type=float, default=None, metavar='SEKUNDY',
+                        help="powtarzaj każdy test przez podany czas zamiast stałej liczby powtórzeń")
+    parser.add_argument('--explain', action='store_true',
+                        help="zapisz plan zapytania najwolniejszej instrukcji każdego testu (EXPLAIN)")
+    parser.add_argument('--profile', nargs='?', const='sampling', choices=PROFILE_MODES,
+                        help="profiluj kod klienta podczas testów (domyślnie próbkowanie stosów do formatu flame graph)")
+    parser.add_argument('--profile-tests', type=lambda value: [name for name in value.split(',') if name],
+                        default=None, metavar='LISTA',
+                        help="profiluj tylko testy, których nazwy zawierają podane fragmenty")
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR,
+                        help="katalog na profile poszczególnych testów")
+    parser.add_argument('--show', action='store_true',
+                        help="wyświetl wykresy przeglądowe w oknie po zakończeniu (wymaga środowiska graficznego)")
+    parser.add_argument('--backends', type=backend_list, default=None, metavar='LISTA',
+                        help=f"backendy do uruchomienia, rozdzielone przecinkami (domyślnie: {','.join(BACKENDS)})")
+    parser.add_argument('--no-charts', action='store_true',
+                        help="nie rysuj wykresów, wypisz tylko podsumowanie")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="liczba procesów rysujących wykresy (domyślnie liczba rdzeni)")
+    parser.add_argument('--output-dir', default='.',
+                        help="katalog na wykresy i manifest skrótów danych")
+    parser.add_argument('--force-charts', action='store_true',
+                        help="narysuj wszystkie wykresy, nawet jeśli dane się nie zmieniły")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help="plik SQLite z zapisanymi przebiegami")
+    parser.add_argument('--list-runs', action='store_true',
+                        help="wypisz zapisane przebiegi i zakończ")
+    parser.add_argument('--compare', nargs='?', const='', metavar='RUN_ID',
+                        help="porównaj przebieg (domyślnie ostatni) z bazowym i zakończ")
+    parser.add_argument('--report', nargs='?', const='', metavar='RUN_ID',
+                        help="utwórz raport HTML z zapisanego przebiegu (domyślnie ostatniego) i zakończ")
+    parser.add_argument('--report-path', default=DEFAULT_REPORT_PATH,
+                        help="plik wynikowy raportu HTML")
+    parser.add_argument('--baseline', metavar='RUN_ID',
+                        help="przebieg bazowy dla --compare")
+    parser.add_argument('--baseline-window', type=int, default=1,
+                        help="liczba wcześniejszych przebiegów z tą samą konfiguracją użytych jako baza")
+    parser.add_argument('--alpha', type=float, default=0.05,
+                        help="poziom istotności testu Manna-Whitneya")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="minimalna względna zmiana mediany uznawana za regresję")
+    args = parser.parse_args()
+
     print("Tester wydajności baz danych")
     print("=" * 50)
 
-    visualizer = DatabaseBenchmarkVisualizer()
+    visualizer = DatabaseBenchmarkVisualizer(args.store, show=args.show, workers=args.workers,
+                                             output_dir=args.output_dir, force_charts=args.force_charts,
+                                             backends=args.backends, charts=not args.no_charts)
+
+    if args.list_runs:
+        visualizer.print_runs()
+        return 0
+
+    if args.report is not None:
+        visualizer.create_html_report(args.report or None, args.report_path)
+        return 0
+
+    if args.compare is not None:
+        regressions = visualizer.run_comparison(args.compare or None, args.baseline, args.baseline_window,
+                                                args.alpha, args.threshold)
+        return 1 if regressions else 0
 
     try:
 
         print("Uruchamianie testów...")
-        visualizer.run_all_tests()
+        if args.index_matrix:
+            visualizer.run_index_matrix()
+        elif args.durability_sweep:
+            visualizer.run_durability_sweep()
+        elif args.isolation_sweep:
+            visualizer.run_isolation_sweep()
+        elif args.batch_sweep:
+            visualizer.run_batch_sweep()
+        else:
+            profiler = (HarnessProfiler(args.profile_dir, args.profile, args.profile_tests)
+                        if args.profile else None)
+            visualizer.run_all_tests(args.duration, args.explain, profiler)
 
         print(f"\n✅ Analiza zakończona pomyślnie!")
         print(f"🕒 Czas: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return 0
 
     except KeyboardInterrupt:
         print("\n⚠️ Analiza przerwana przez użytkownika")
+        # Konwencja powłoki dla przerwania przez SIGINT (128 + 2).
+        return 130
     except Exception as e:
         print(f"\n❌ Błąd podczas analizy: {e}")
         import traceback
         traceback.print_exc()
+        return 1
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,73 @@
+import importlib
+
+# Moduły backendów (i ich sterowniki) importujemy dopiero, gdy backend jest faktycznie uruchamiany.
+BACKENDS = {
+    'MySQL': {
+        'module': 'testfiles.mysql_test',
+        'tests': 'mysql_tests',
+        'load_benchmark': 'mysql_load_benchmark',
+        'explain': 'explain_statement',
+        'index_sets': 'INDEX_SETS',
+    },
+    'PostgreSQL': {
+        'module': 'testfiles.postgres_test',
+        'tests': 'postgresql_tests',
+        'load_benchmark': 'postgresql_load_benchmark',
+        'explain': 'explain_statement',
+        'index_sets': 'INDEX_SETS',
+    },
+    'MongoDB': {
+        'module': 'testfiles.mongodb_test',
+        'tests': 'mongo_tests',
+        'load_benchmark': 'mongo_load_benchmark',
+        'explain': 'explain_command',
+        'index_sets': 'MONGO_INDEX_SETS',
+    },
+    'DynamoDB': {
+        'module': 'testfiles.dynamodb_test',
+        'tests': 'dynamo_tests',
+        'load_benchmark': 'dynamo_load_benchmark',
+        'max_batch': 'DYNAMO_MAX_BATCH',
+        'index_sets': 'INDEX_SETS',
+    },
+}
+
+
+def load_backend(name):
+    return importlib.import_module(BACKENDS[name]['module'])
+
+
+def backend_attribute(name, key, default=None):
+    attribute = BACKENDS[name].get(key)
+    if attribute is None:
+        return default
+    return getattr(load_backend(name), attribute)
+
+
+def backend_tests(name):
+    return backend_attribute(name, 'tests')
+
+
+def backend_load_benchmark(name):
+    return backend_attribute(name, 'load_benchmark')
+
+
+def durability_modes(name):
+    return getattr(load_backend(name), 'DURABILITY_MODES', {})
+
+
+def index_sets(name):
+    return backend_attribute(name, 'index_sets', {})
+
+
+def supports_explain(name):
+    return 'explain' in BACKENDS[name]
+
+
+def parse_backends(value):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    known = {name.lower(): name for name in BACKENDS}
+    unknown = [name for name in names if name.lower() not in known]
+    if unknown:
+        raise ValueError(f"Nieznane backendy: {', '.join(unknown)} (dostępne: {', '.join(BACKENDS)})")
+    return [known[name.lower()] for name in names]
@@ -0,0 +1,32 @@
+import numpy as np
+
+BOOTSTRAP_RESAMPLES = 10000
+CONFIDENCE = 0.95
+
+
+def bootstrap_means(samples, resamples=BOOTSTRAP_RESAMPLES, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    values = np.asarray(samples, dtype=float)
+    indices = rng.integers(0, len(values), size=(resamples, len(values)))
+    return values[indices].mean(axis=1)
+
+
+def percentile_interval(replicates, confidence=CONFIDENCE):
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(replicates, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def size_confidence_intervals(size_details, confidence=CONFIDENCE, resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    rng = np.random.default_rng(seed)
+    replicates = {test_name: bootstrap_means(times, resamples, rng)
+                  for test_name, times in size_details.get('samples', {}).items() if times}
+
+    intervals = {test_name: percentile_interval(values, confidence) for test_name, values in replicates.items()}
+
+    # Suma kategorii CRUD to suma średnich testów, więc sumujemy repliki testów.
+    for crud_op, test_names in size_details.get('crud_categories', {}).items():
+        members = [replicates[test_name] for test_name in test_names if test_name in replicates]
+        if members:
+            intervals[crud_op] = percentile_interval(np.sum(members, axis=0), confidence)
+    return intervals
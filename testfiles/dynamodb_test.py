@@ -5,6 +5,37 @@ import string
 import time
 from datetime import datetime
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+from testfiles.runner import run_suite, run_batch_sweep, write_in_batches, OperationMeter
+
+USE_GSI = True
+
+GSI_DEFINITIONS = {
+    'Book_Ratings': {'IndexName': 'ISBN-index', 'AttributeName': 'ISBN'},
+    'Orders': {'IndexName': 'User_ID-index', 'AttributeName': 'User_ID'},
+    'Books': {'IndexName': 'Genre_Id-index', 'AttributeName': 'Genre_Id'},
+}
+
+# Klucza tabeli nie da się usunąć, więc nie ma zestawu 'none'; 'primary' oznacza Scan zamiast GSI.
+INDEX_SETS = {
+    'primary': {'gsi': False},
+    'full': {'gsi': True},
+}
+
+# Odczyt świeżo zapisanego elementu przez GSI ponawiamy najwyżej tyle razy (opóźnienie rośnie wykładniczo).
+GSI_READ_ATTEMPTS = 5
+GSI_RETRY_DELAY = 0.05
+
+# BatchWriteItem przyjmuje najwyżej 25 elementów na żądanie.
+DYNAMO_MAX_BATCH = 25
+DYNAMO_BATCH_ATTEMPTS = 8
+DYNAMO_BATCH_BACKOFF = 0.05
+
+CAPACITY_OPERATIONS = {
+    'GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query', 'Scan',
+    'BatchGetItem', 'BatchWriteItem', 'TransactGetItems', 'TransactWriteItems',
+}
+READ_OPERATIONS = {'GetItem', 'Query', 'Scan', 'BatchGetItem', 'TransactGetItems'}
 
 @pytest.fixture(scope="module")
 def db():
@@ -26,6 +57,51 @@ def random_isbn():
 def random_code():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
+def lookup_by_index(db, table_name, value, count_only=False):
+    table = db.Table(table_name)
+    index = GSI_DEFINITIONS[table_name]
+    if USE_GSI:
+        method = table.query
+        kwargs = {
+            'IndexName': index['IndexName'],
+            'KeyConditionExpression': Key(index['AttributeName']).eq(value)
+        }
+    else:
+        method = table.scan
+        kwargs = {'FilterExpression': Attr(index['AttributeName']).eq(value)}
+    if count_only:
+        kwargs['Select'] = 'COUNT'
+    items = []
+    count = 0
+    while True:
+        response = method(**kwargs)
+        items.extend(response.get('Items', []))
+        count += response['Count']
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+    return count if count_only else items
+
+
+def lookup_written_by_index(db, table_name, value, key_name, *key_values):
+    # GSI (i Scan bez ConsistentRead) są tylko ostatecznie spójne, więc przed chwilą zapisane elementy
+    # mogą jeszcze nie być widoczne. DynamoDB Local zwraca je od razu; na AWS ponawiamy z limitem prób.
+    for attempt in range(GSI_READ_ATTEMPTS):
+        items = lookup_by_index(db, table_name, value)
+        found = {item.get(key_name) for item in items}
+        if all(key_value in found for key_value in key_values) or attempt == GSI_READ_ATTEMPTS - 1:
+            return items
+        time.sleep(GSI_RETRY_DELAY * 2 ** attempt)
+
+
+def count_written_by_index(db, table_name, value, expected):
+    for attempt in range(GSI_READ_ATTEMPTS):
+        count = lookup_by_index(db, table_name, value, count_only=True)
+        if count >= expected or attempt == GSI_READ_ATTEMPTS - 1:
+            return count
+        time.sleep(GSI_RETRY_DELAY * 2 ** attempt)
+
 def test_insert_book_genre(db):
     table = db.Table('Book_Genres')
     genre_id = str(random.randint(1000000, 9999999))
@@ -197,17 +273,8 @@ def test_insert_book_rating_group_by(db):
             'User_ID': user_id,
             'ISBN': isbn
         })
-    time.sleep(0.1)
-    ratings = []
-    for rating_id in rating_ids:
-        try:
-            response = rating_table.get_item(Key={'Rating_ID': rating_id})
-            if 'Item' in response:
-                item = response['Item']
-                if item['ISBN'] == isbn:
-                    ratings.append(item['Book_Rating'])
-        except Exception as e:
-            pass
+    ratings = [item['Book_Rating']
+               for item in lookup_written_by_index(db, 'Book_Ratings', isbn, 'Rating_ID', *rating_ids)]
     assert len(ratings) == 3
 
 def test_insert_book_rating_join(db):
@@ -382,17 +449,8 @@ def test_get_average_book_rating_above(db):
             'ISBN': isbn
         })
         vals.append(r)
-    time.sleep(0.1)
-    ratings = []
-    for rating_id in rating_ids:
-        try:
-            response = rating_table.get_item(Key={'Rating_ID': rating_id})
-            if 'Item' in response:
-                item = response['Item']
-                if item['ISBN'] == isbn:
-                    ratings.append(float(item['Book_Rating']))
-        except Exception as e:
-            pass
+    ratings = [float(item['Book_Rating'])
+               for item in lookup_written_by_index(db, 'Book_Ratings', isbn, 'Rating_ID', *rating_ids)]
     if len(ratings) > 0:
         avg = sum(ratings) / len(ratings)
     else:
@@ -441,22 +499,8 @@ def test_get_genre_book_counts_group_by(db):
         'Publisher_Id': publisher_id,
         'Author_id': author_id
     })
-    time.sleep(0.2)
-    g1_books = []
-    for isbn in g1_isbns:
-        try:
-            response = book_table.get_item(Key={'ISBN': isbn})
-            if 'Item' in response and response['Item']['Genre_Id'] == g1:
-                g1_books.append(response['Item'])
-        except Exception as e:
-            pass
-    g2_books = []
-    try:
-        response = book_table.get_item(Key={'ISBN': g2_isbn})
-        if 'Item' in response and response['Item']['Genre_Id'] == g2:
-            g2_books.append(response['Item'])
-    except Exception as e:
-        pass
+    g1_books = lookup_written_by_index(db, 'Books', g1, 'ISBN', *g1_isbns)
+    g2_books = lookup_written_by_index(db, 'Books', g2, 'ISBN', g2_isbn)
     assert len(g1_books) == 2, f"Oczekiwano 2 książki w gatunku g1, znaleziono {len(g1_books)}"
     assert len(g2_books) == 1, f"Oczekiwano 1 książkę w gatunku g2, znaleziono {len(g2_books)}"
 
@@ -512,11 +556,11 @@ def test_get_users_and_orders_join(db):
         'Order_Date': datetime.now().strftime("%Y-%m-%d"),
         'Order_Cost': Decimal('88.8')
     })
-    time.sleep(0.1)
     user = user_table.get_item(Key={'users_id': user_id})['Item']
-    order = order_table.get_item(Key={'Order_ID': order_id})['Item']
+    orders = lookup_written_by_index(db, 'Orders', user['users_id'], 'Order_ID', order_id)
     assert user['location'] == "JoinLoc"
-    assert order['Order_Cost'] == Decimal('88.8')
+    assert len(orders) == 1 and orders[0]['Order_ID'] == order_id
+    assert orders[0]['Order_Cost'] == Decimal('88.8')
 
 def get_any_publisher(db):
     table = db.Table('Publishers')
@@ -608,15 +652,7 @@ def test_update_genre_popularity_group_by(db):
             'Author_id': author_id
         })
         book_isbns.append(isbn)
-    time.sleep(0.1)
-    books_count = 0
-    for isbn in book_isbns:
-        try:
-            response = book_table.get_item(Key={'ISBN': isbn})
-            if 'Item' in response and response['Item']['Genre_Id'] == genre_id:
-                books_count += 1
-        except Exception as e:
-            pass
+    books_count = count_written_by_index(db, 'Books', genre_id, len(book_isbns))
     if books_count > 1:
         genre_table.update_item(
             Key={'id': genre_id},
@@ -678,8 +714,8 @@ def test_update_user_with_order_join(db):
         'Order_Date': datetime.now().strftime("%Y-%m-%d"),
         'Order_Cost': Decimal('77.7')
     })
-    order = order_table.get_item(Key={'Order_ID': order_id})['Item']
-    if order['User_ID'] == user_id:
+    orders = lookup_written_by_index(db, 'Orders', user_id, 'Order_ID', order_id)
+    if orders:
         new_loc = f"JoinLoc-{random_suffix()}"
         user_table.update_item(
             Key={'users_id': user_id},
@@ -764,11 +800,7 @@ def test_delete_books_with_few_ratings_group_by(db):
         'User_ID': user_id,
         'ISBN': isbn
     })
-    ratings_count = rating_table.scan(
-        FilterExpression='#isbn = :isbn',
-        ExpressionAttributeNames={'#isbn': 'ISBN'},
-        ExpressionAttributeValues={':isbn': isbn}
-    )['Count']
+    ratings_count = count_written_by_index(db, 'Book_Ratings', isbn, 1)
     if ratings_count < 2:
         book_table.delete_item(Key={'ISBN': isbn})
     doc = book_table.get_item(Key={'ISBN': isbn})
@@ -828,12 +860,18 @@ def test_delete_orders_with_user_join(db):
     })
     user = user_table.get_item(Key={'users_id': user_id})['Item']
     if user['location'] == "DelJoinLoc":
-        order_table.delete_item(Key={'Order_ID': order_id})
+        for order in lookup_written_by_index(db, 'Orders', user['users_id'], 'Order_ID', order_id):
+            order_table.delete_item(Key={'Order_ID': order['Order_ID']})
     doc = order_table.get_item(Key={'Order_ID': order_id})
     assert 'Item' not in doc
 
 
-def dynamo_tests():
+def dynamo_tests(index_set='full', details=None, duration=None, profiler=None):
+    global USE_GSI
+    USE_GSI = INDEX_SETS[index_set]['gsi']
+
+    # boto3 otwiera połączenie HTTP leniwie; mierzymy przygotowanie klienta.
+    connect_start = time.perf_counter()
     dynamodb = boto3.resource(
         'dynamodb',
         region_name='eu-north-1',
@@ -841,6 +879,10 @@ def dynamo_tests():
         aws_access_key_id='test',
         aws_secret_access_key='test'
     )
+    connect_time = time.perf_counter() - connect_start
+    meter = OperationMeter()
+    register_capacity_metering(dynamodb, meter)
+    register_phase_timing(dynamodb, meter)
 
     tests = [
         test_insert_book_genre,
@@ -896,75 +938,148 @@ def dynamo_tests():
     runs_per_test = 5
 
     print(f"Znaleziono {len(tests)} testów DynamoDB")
+    print(f"Tryb wyszukiwania: {'Query (GSI)' if USE_GSI else 'Scan'}")
 
-    individual_results = {}
-    crud_results = {}
+    # DynamoDB Local nie udostępnia swojej wersji przez API.
+    versions = {'server': None, 'driver': f"boto3 {boto3.__version__}"}
 
-    for data_size in data_sizes:
-        print(f"\n{'=' * 60}")
-        print(f"TESTY DYNAMODB DLA ROZMIARU DANYCH: {data_size}")
-        print(f"{'=' * 60}")
+    def prepare(data_size):
+        load_stats = {}
+        prepare_dynamo_test_data(dynamodb, data_size, load_stats=load_stats)
+        return {'index_set': index_set, 'ingestion': load_stats, 'versions': versions,
+                'connect_time': connect_time}
 
-        individual_results[data_size] = {}
-        crud_results[data_size] = {
-            'CREATE': [],
-            'READ': [],
-            'UPDATE': [],
-            'DELETE': []
-        }
+    return run_suite('DynamoDB', dynamodb, tests, crud_categories, data_sizes, runs_per_test,
+                     prepare, lambda: cleanup_dynamo_test_data(dynamodb), details, meter=meter,
+                     duration=duration, profiler=profiler)
+
+
+def register_capacity_metering(db, meter):
+    events = db.meta.client.meta.events
+
+    def request_capacity(params, model, **kwargs):
+        if model.name in CAPACITY_OPERATIONS:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
 
-        prepare_dynamo_test_data(dynamodb, data_size)
-
-        for test in tests:
-            times = []
-            status = "OK"
-            for run in range(runs_per_test):
-                start = time.time()
-                try:
-                    test(dynamodb)
-                    duration = time.time() - start
-                    times.append(duration)
-                except AssertionError as e:
-                    status = f"FAIL ({e})"
-                    break
-                except Exception as e:
-                    status = f"ERROR ({e.__class__.__name__})"
-                    break
-
-            if times:
-                avg_time = sum(times) / len(times)
-
-                test_name = test.__name__
-
-                individual_results[data_size][test_name] = avg_time
-
-                for crud_op, test_names in crud_categories.items():
-                    if test_name in test_names:
-                        crud_results[data_size][crud_op].append(avg_time)
-                        break
-            else:
-                print(f"{test.__name__:35} → {status:10} (test nie przeszedł)")
+    def record_capacity(parsed, model, **kwargs):
+        if model.name not in CAPACITY_OPERATIONS:
+            return
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        units = sum(entry.get('CapacityUnits', 0) for entry in consumed)
+        meter.add('read_capacity_units' if model.name in READ_OPERATIONS else 'write_capacity_units', units)
 
+        if 'Count' in parsed:
+            meter.add('rows', parsed['Count'])
+        elif 'Responses' in parsed:
+            meter.add('rows', sum(len(items) for items in parsed['Responses'].values()))
+        elif model.name in ('GetItem', 'PutItem', 'UpdateItem', 'DeleteItem'):
+            meter.add('rows', 1 if model.name != 'GetItem' or 'Item' in parsed else 0)
+
+    events.register('before-parameter-build.dynamodb', request_capacity)
+    events.register('after-call.dynamodb', record_capacity)
+
+
+def register_phase_timing(db, meter):
+    events = db.meta.client.meta.events
+    marks = {}
+
+    # before-send -> before-parse to wysłanie żądania, praca serwera i odbiór odpowiedzi HTTP;
+    # before-parse -> after-call to parsowanie odpowiedzi (w tym konwersja na Decimal).
+    def request_sent(**kwargs):
+        marks['sent'] = time.perf_counter()
+
+    def response_received(**kwargs):
+        marks['received'] = time.perf_counter()
+        if 'sent' in marks:
+            meter.add_phase('execute', marks['received'] - marks.pop('sent'))
+
+    def response_parsed(**kwargs):
+        if 'received' in marks:
+            meter.add_phase('fetch', time.perf_counter() - marks.pop('received'))
+
+    events.register('before-send.dynamodb', request_sent)
+    events.register('before-parse.dynamodb', response_received)
+    events.register('after-call.dynamodb', response_parsed)
+    events.register('after-call-error.dynamodb', lambda **kwargs: marks.clear())
+
+
+def dynamo_load_benchmark(batch_sizes=(1, 10, 25), data_size=10000):
+    dynamodb = boto3.resource(
+        'dynamodb',
+        region_name='eu-north-1',
+        endpoint_url='http://localhost:8000',
+        aws_access_key_id='test',
+        aws_secret_access_key='test'
+    )
+
+    def load(batch_size, load_stats):
+        cleanup_dynamo_test_data(dynamodb)
+        prepare_dynamo_test_data(dynamodb, data_size, batch_size, load_stats)
+
+    try:
+        results = run_batch_sweep('DynamoDB', load, batch_sizes)
+    finally:
         cleanup_dynamo_test_data(dynamodb)
+    return results
 
-    final_results = {}
-    for data_size in data_sizes:
-        final_results[data_size] = {}
-        for crud_op in ['CREATE', 'READ', 'UPDATE', 'DELETE']:
-            times = crud_results[data_size][crud_op]
-            if times:
-                final_results[data_size][crud_op] = sum(times)
-            else:
-                final_results[data_size][crud_op] = 0.0
 
-        for test_name, time_val in individual_results[data_size].items():
-            final_results[data_size][test_name] = time_val
+def write_dynamo_batch(db, table_name, items):
+    requests = 0
+    request_items = {table_name: [{'PutRequest': {'Item': item}} for item in items]}
+    while True:
+        response = db.batch_write_item(RequestItems=request_items)
+        request_items = response.get('UnprocessedItems') or {}
+        requests += 1
+        if not request_items:
+            return requests, requests - 1
+        if requests >= DYNAMO_BATCH_ATTEMPTS:
+            unprocessed = sum(len(entries) for entries in request_items.values())
+            raise RuntimeError(f"{unprocessed} elementów {table_name} nie zapisano po {requests} próbach")
+        # Niezapisane elementy (zwykle przez dławienie) ponawiamy z wykładniczym opóźnieniem i losowym rozrzutem.
+        time.sleep(random.uniform(0, DYNAMO_BATCH_BACKOFF * 2 ** (requests - 1)))
 
-    return final_results
 
+def ensure_dynamo_indexes(db):
+    client = db.meta.client
+    for table_name, index in GSI_DEFINITIONS.items():
+        description = client.describe_table(TableName=table_name)['Table']
+        existing = [gsi['IndexName'] for gsi in description.get('GlobalSecondaryIndexes', [])]
+        if index['IndexName'] in existing:
+            continue
+        print(f"Tworzenie indeksu {index['IndexName']} na tabeli {table_name}...")
+        create = {
+            'IndexName': index['IndexName'],
+            'KeySchema': [{'AttributeName': index['AttributeName'], 'KeyType': 'HASH'}],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+        if description.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+            throughput = description['ProvisionedThroughput']
+            create['ProvisionedThroughput'] = {
+                'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+                'WriteCapacityUnits': throughput['WriteCapacityUnits']
+            }
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=[{'AttributeName': index['AttributeName'], 'AttributeType': 'S'}],
+            GlobalSecondaryIndexUpdates=[{'Create': create}]
+        )
+    for table_name, index in GSI_DEFINITIONS.items():
+        while True:
+            description = client.describe_table(TableName=table_name)['Table']
+            statuses = {gsi['IndexName']: gsi['IndexStatus']
+                        for gsi in description.get('GlobalSecondaryIndexes', [])}
+            if statuses.get(index['IndexName']) == 'ACTIVE':
+                break
+            time.sleep(1)
+    print("Indeksy GSI DynamoDB aktywne.")
 
-def prepare_dynamo_test_data(db, size):
-    batch_size = 1000
+def prepare_dynamo_test_data(db, size, batch_size=None, load_stats=None):
+    if USE_GSI:
+        ensure_dynamo_indexes(db)
+    if batch_size:
+        batch_size = min(batch_size, DYNAMO_MAX_BATCH)
     genres_data = []
     for i in range(20):
         genres_data.append({
@@ -1040,10 +1155,16 @@ def prepare_dynamo_test_data(db, size):
         })
     def batch_write(table_name, items):
         table = db.Table(table_name)
-        for i in range(0, len(items), batch_size):
+
+        def write_batch(chunk):
+            if batch_size:
+                return write_dynamo_batch(db, table_name, chunk)
             with table.batch_writer() as batch:
-                for item in items[i:i+batch_size]:
+                for item in chunk:
                     batch.put_item(Item=item)
+            return -(-len(chunk) // DYNAMO_MAX_BATCH)
+
+        write_in_batches(table_name, items, batch_size or 1000, write_batch, load_stats)
     print(f"Przygotowywanie {size} rekordów testowych DynamoDB...")
     batch_write('Book_Genres', genres_data)
     batch_write('Publishers', publishers_data)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from testfiles.runner import CRUD_OPERATIONS
+
+COLUMNS = ['backend', 'size', 'test', 'crud_op', 'iteration', 'latency_ns']
+
+TEST_PREFIXES = {
+    'test_insert': 'CREATE',
+    'test_get': 'READ',
+    'test_update': 'UPDATE',
+    'test_delete': 'DELETE',
+}
+
+
+def crud_operation(test_name, categories=None):
+    if categories and test_name in categories:
+        return categories[test_name]
+    for prefix, crud_op in TEST_PREFIXES.items():
+        if test_name.startswith(prefix):
+            return crud_op
+    return None
+
+
+def results_frame(results, details=None):
+    details = details or {}
+    backends, sizes, tests, crud_ops, iterations, latencies = [], [], [], [], [], []
+
+    for backend, db_data in results.items():
+        for size, size_data in db_data.items():
+            size_details = details.get(backend, {}).get(size, {})
+            categories = {test_name: crud_op
+                          for crud_op, test_names in size_details.get('crud_categories', {}).items()
+                          for test_name in test_names}
+            samples = size_details.get('samples', {})
+
+            for test_name, mean in size_data.items():
+                if test_name in CRUD_OPERATIONS:
+                    continue
+                # Bez próbek (np. starsze przebiegi) zapisujemy samą średnią jako jedną iterację.
+                times = np.asarray(samples.get(test_name) or [mean], dtype=float)
+                count = len(times)
+                backends.append(np.repeat(backend, count))
+                sizes.append(np.full(count, size, dtype=np.int64))
+                tests.append(np.repeat(test_name, count))
+                crud_ops.append(np.repeat(crud_operation(test_name, categories), count))
+                iterations.append(np.arange(count, dtype=np.int64))
+                latencies.append(np.rint(times * 1e9).astype(np.int64))
+
+    if not latencies:
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in COLUMNS})
+
+    frame = pd.DataFrame({
+        'backend': np.concatenate(backends),
+        'size': np.concatenate(sizes),
+        'test': np.concatenate(tests),
+        'crud_op': np.concatenate(crud_ops),
+        'iteration': np.concatenate(iterations),
+        'latency_ns': np.concatenate(latencies),
+    })
+    for column in ['backend', 'test', 'crud_op']:
+        frame[column] = pd.Categorical(frame[column], categories=pd.unique(frame[column].dropna()))
+    return frame
+
+
+def test_means(frame):
+    grouped = frame.groupby(['backend', 'size', 'crud_op', 'test'], observed=True, sort=False)['latency_ns']
+    return grouped.mean() / 1e9
+
+
+def crud_totals(frame):
+    totals = test_means(frame).groupby(level=['backend', 'size', 'crud_op'], observed=True, sort=False).sum()
+    table = totals.unstack('crud_op').reindex(columns=CRUD_OPERATIONS).fillna(0.0)
+    table.columns = list(table.columns)
+    return table
+
+
+def test_summary(frame):
+    grouped = frame.groupby(['backend', 'size', 'test'], observed=True, sort=False)['latency_ns']
+    summary = pd.DataFrame({
+        'mean': grouped.mean(),
+        'p50': grouped.median(),
+        'p95': grouped.quantile(0.95),
+        'samples': grouped.count(),
+    })
+    summary[['mean', 'p50', 'p95']] /= 1e9
+    return summary
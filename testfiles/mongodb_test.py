@@ -5,7 +5,43 @@ import string
 import time
 from datetime import datetime, date
 from bson import ObjectId
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, monitoring
+from pymongo.write_concern import WriteConcern
+from testfiles.runner import (run_suite, run_batch_sweep, write_in_batches, OperationMeter, plan_nodes,
+                              LARGE_SCAN_ROWS)
+
+RUN_TAG = "ztb_benchmark"
+
+MONGO_INDEXES = {
+    'genres': ['id', 'run_tag'],
+    'publishers': ['publisher_id', 'run_tag'],
+    'authors': ['author_id', 'run_tag'],
+    'users': ['users_id', 'run_tag'],
+    'books': ['isbn', 'genre_id', 'run_tag'],
+    'ratings': ['isbn', 'user_id', 'run_tag'],
+    'orders': ['order_id', 'user_id', 'run_tag'],
+}
+
+MONGO_INDEX_SETS = {
+    'none': {},
+    'primary': {
+        'genres': ['id'],
+        'publishers': ['publisher_id'],
+        'authors': ['author_id'],
+        'users': ['users_id'],
+        'books': ['isbn'],
+        'orders': ['order_id'],
+    },
+    'full': MONGO_INDEXES,
+}
+
+# w=0 pominięte - niepotwierdzone zapisy nie zwracają modified_count/deleted_count,
+# na których opierają się asercje testów.
+DURABILITY_MODES = {
+    'default': None,
+    'durable': WriteConcern(w=1, j=True),
+    'relaxed': WriteConcern(w=1, j=False),
+}
 
 
 @pytest.fixture(scope="module")
@@ -1133,9 +1169,100 @@ def test_delete_orders_with_user_lookup(db):
 # TEST START
 # -----------------------
 
-def mongo_tests():
-    client = MongoClient('mongodb://localhost:27017/')
-    db = client['ZTB_Database_Mongo']
+EXPLAIN_COMMANDS = {'find', 'aggregate', 'update', 'delete', 'findAndModify', 'count', 'distinct'}
+
+# Pola dodawane przez sterownik, których komenda explain nie przyjmuje.
+EXPLAIN_IGNORED_FIELDS = {'lsid', '$db', '$clusterTime', 'txnNumber', '$readPreference', 'writeConcern', 'readConcern'}
+
+COMMAND_PHASES = {'getMore': 'fetch', 'commitTransaction': 'commit', 'abortTransaction': 'commit'}
+
+
+class RowCountingListener(monitoring.CommandListener):
+    def __init__(self, meter):
+        self.meter = meter
+        self.pending = {}
+
+    def started(self, event):
+        if self.meter.capture_statements and event.command_name in EXPLAIN_COMMANDS:
+            self.pending[event.request_id] = (event.command_name, event.database_name, dict(event.command))
+
+    def record_phase(self, event):
+        # duration_micros obejmuje wysłanie polecenia, wykonanie na serwerze i odbiór odpowiedzi.
+        phase = COMMAND_PHASES.get(event.command_name, 'execute')
+        self.meter.add_phase(phase, event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self.record_phase(event)
+        statement = self.pending.pop(event.request_id, None)
+        if statement is not None:
+            self.meter.record_statement(statement, event.duration_micros / 1e6)
+
+        reply = event.reply
+        if 'cursor' in reply:
+            cursor = reply['cursor']
+            self.meter.add('rows', len(cursor.get('firstBatch', cursor.get('nextBatch', []))))
+        elif event.command_name in ('insert', 'update', 'delete'):
+            self.meter.add('rows', reply.get('n', 0))
+        elif event.command_name == 'findAndModify' and reply.get('value') is not None:
+            self.meter.add('rows', 1)
+
+    def failed(self, event):
+        self.record_phase(event)
+        self.pending.pop(event.request_id, None)
+
+
+def plan_warnings(command_name, command, plan):
+    nodes = list(plan_nodes(plan))
+    scanned = max([node.get('docsExamined', 0) for node in nodes]
+                  + [node.get('totalDocsExamined', 0) for node in nodes])
+    collection_scan = any(node.get('stage') == 'COLLSCAN' or node.get('collectionScans', 0) > 0 for node in nodes)
+    if collection_scan and scanned >= LARGE_SCAN_ROWS:
+        return [f"COLLSCAN w {command_name} na {command.get(command_name)} ({scanned:,} dokumentów)"]
+    return []
+
+
+def explain_command(client, statement):
+    command_name, database_name, command = statement
+    command = {name: value for name, value in command.items() if name not in EXPLAIN_IGNORED_FIELDS}
+    plan = client[database_name].command({'explain': command, 'verbosity': 'executionStats'})
+    plan = {name: value for name, value in plan.items() if name not in ('$clusterTime', 'operationTime')}
+    return {'statement': repr(command), 'plan': plan, 'warnings': plan_warnings(command_name, command, plan)}
+
+
+def server_stats(db):
+    # serverStatus zlicza operacje całego serwera; sama komenda zwiększa opcounters.command o 1
+    # (ten koszt odejmuje calibrate_stats w run_suite).
+    try:
+        status = db.client.admin.command('serverStatus')
+    except pymongo.errors.PyMongoError as e:
+        print(f"Nie udało się odczytać statystyk serwera MongoDB: {e}")
+        return {}
+
+    metrics = status.get('metrics', {})
+    stats = {f"opcounters_{name}": value for name, value in status.get('opcounters', {}).items()}
+    stats.update({f"documents_{name}": value for name, value in metrics.get('document', {}).items()})
+    stats['keys_examined'] = metrics.get('queryExecutor', {}).get('scanned', 0)
+    stats['docs_examined'] = metrics.get('queryExecutor', {}).get('scannedObjects', 0)
+    cache = status.get('wiredTiger', {}).get('cache', {})
+    stats['cache_pages_requested'] = cache.get('pages requested from the cache', 0)
+    stats['cache_pages_read'] = cache.get('pages read into cache', 0)
+    latencies = status.get('opLatencies', {})
+    stats['exec_time_ms'] = sum(latencies.get(name, {}).get('latency', 0)
+                                for name in ('reads', 'writes', 'commands')) / 1000
+    stats['lock_waits'] = sum(count for lock in status.get('locks', {}).values()
+                              for count in lock.get('acquireWaitCount', {}).values())
+    return {name: float(value) for name, value in stats.items()}
+
+
+def mongo_tests(index_set='full', durability='default', details=None, duration=None, explain=False,
+                profiler=None):
+    meter = OperationMeter()
+    connect_start = time.perf_counter()
+    # MongoClient łączy się leniwie, więc czas połączenia obejmuje pierwsze polecenie ping.
+    client = MongoClient('mongodb://localhost:27017/', event_listeners=[RowCountingListener(meter)])
+    client.admin.command('ping')
+    connect_time = time.perf_counter() - connect_start
+    db = client.get_database('ZTB_Database_Mongo', write_concern=DURABILITY_MODES[durability])
 
     tests = [
         test_insert_book_genre,
@@ -1191,94 +1318,101 @@ def mongo_tests():
     runs_per_test = 5
 
     print(f"Znaleziono {len(tests)} testów MongoDB")
+    print(f"Zestaw indeksów: {index_set}")
+    print(f"Tryb trwałości: {durability}")
 
-    total_start = time.time()
-    individual_results = {}
-    crud_results = {}
-
-    for data_size in data_sizes:
-        print(f"\n{'=' * 60}")
-        print(f"TESTY MONGODB DLA ROZMIARU DANYCH: {data_size}")
-        print(f"{'=' * 60}")
-
-        individual_results[data_size] = {}
-        crud_results[data_size] = {
-            'CREATE': [],
-            'READ': [],
-            'UPDATE': [],
-            'DELETE': []
-        }
-
-        prepare_mongo_test_data(db, data_size)
-
-        for test in tests:
-            times = []
-            status = "OK"
-            for run in range(runs_per_test):
-                start = time.time()
-                try:
-                    test(db)
-                    duration = time.time() - start
-                    times.append(duration)
-                except AssertionError as e:
-                    status = f"FAIL ({e})"
-                    break
-                except Exception as e:
-                    status = f"ERROR ({e.__class__.__name__})"
-                    break
-
-            if times:
-                avg_time = sum(times) / len(times)
-
-                test_name = test.__name__
-
-                individual_results[data_size][test_name] = avg_time
-
-                for crud_op, test_names in crud_categories.items():
-                    if test_name in test_names:
-                        crud_results[data_size][crud_op].append(avg_time)
-                        break
-            else:
-                print(f"{test.__name__:35} → {status:10} (test nie przeszedł)")
-
-        cleanup_mongo_test_data(db)
+    versions = {'server': client.server_info()['version'], 'driver': f"pymongo {pymongo.version}"}
 
-    final_results = {}
-    for data_size in data_sizes:
-        final_results[data_size] = {}
-        for crud_op in ['CREATE', 'READ', 'UPDATE', 'DELETE']:
-            times = crud_results[data_size][crud_op]
-            if times:
-                final_results[data_size][crud_op] = sum(times)
-            else:
-                final_results[data_size][crud_op] = 0.0
+    def prepare(data_size):
+        load_stats = {}
+        prepare_mongo_test_data(db, data_size, index_set, load_stats=load_stats)
+        return {'index_set': index_set, 'durability': durability, 'indexes': describe_mongo_indexes(db),
+                'ingestion': load_stats, 'versions': versions, 'connect_time': connect_time}
 
-        for test_name, time_val in individual_results[data_size].items():
-            final_results[data_size][test_name] = time_val
+    final_results = run_suite('MongoDB', db, tests, crud_categories, data_sizes, runs_per_test,
+                              prepare, lambda: cleanup_mongo_test_data(db), details, meter=meter,
+                              duration=duration, collect_stats=lambda: server_stats(db),
+                              capture_plan=(lambda statement: explain_command(client, statement))
+                              if explain else None, profiler=profiler)
 
     client.close()
     return final_results
 
 
-def prepare_mongo_test_data(db, size):
+def mongo_load_benchmark(batch_sizes=(1, 10, 100, 1000, 10000), data_size=10000, index_set='full'):
+    client = MongoClient('mongodb://localhost:27017/')
+    db = client['ZTB_Database_Mongo']
+
+    def load(batch_size, load_stats):
+        prepare_mongo_test_data(db, data_size, index_set, batch_size, load_stats)
+
     try:
+        results = run_batch_sweep('MongoDB', load, batch_sizes)
+    finally:
         cleanup_mongo_test_data(db)
+        client.close()
+    return results
+
+
+def create_mongo_indexes(db, index_set='full'):
+    start = time.time()
+    for collection_name, fields in MONGO_INDEX_SETS[index_set].items():
+        for field in fields:
+            db[collection_name].create_index([(field, ASCENDING)], name=f"{field}_1")
+    print(f"Utworzono indeksy MongoDB w {time.time() - start:.2f}s")
+
+
+def drop_mongo_indexes(db):
+    # Usuwamy tylko indeksy tworzone przez create_mongo_indexes, a nie wszystkie indeksy kolekcji.
+    for collection_name, fields in MONGO_INDEXES.items():
+        existing = db[collection_name].index_information()
+        for field in fields:
+            if f"{field}_1" in existing:
+                db[collection_name].drop_index(f"{field}_1")
+
+
+def describe_mongo_indexes(db):
+    return {collection_name: sorted(db[collection_name].index_information().keys())
+            for collection_name in MONGO_INDEXES}
+
+
+def prepare_mongo_test_data(db, size, index_set='full', batch_size=1000, load_stats=None):
+    try:
+        cleanup_mongo_test_data(db)
+        drop_mongo_indexes(db)
         print(f"Przygotowywanie {size} rekordów danych testowych MongoDB...")
 
+        def insert_documents(collection_name, documents):
+            def write_batch(batch):
+                db[collection_name].insert_many(batch)
+                return 1
+            write_in_batches(collection_name, documents, batch_size, write_batch, load_stats)
+
+        def insert_ratings(batch):
+            # Przy ordered=False odrzucone dokumenty nie przerywają partii; liczymy tylko faktycznie zapisane.
+            try:
+                db.ratings.insert_many(batch, ordered=False)
+            except pymongo.errors.BulkWriteError as e:
+                print(f"Pominięto {len(batch) - e.details['nInserted']} ocen: {e.details['writeErrors'][0]['errmsg']}")
+                return 1, 0, e.details['nInserted']
+            return 1
+
         genres_data = []
         for i in range(20):
             genre_data = {
                 "id": 1000000 + i,
+                "run_tag": RUN_TAG,
                 "genre": f"TestGenre_{i}",
                 "popularity": i % 10 + 1
             }
             genres_data.append(genre_data)
-        db.genres.insert_many(genres_data)
+        insert_documents('genres', genres_data)
 
         publishers_data = []
         for i in range(50):
             publisher_data = {
                 "publisher_id": f"TESTPUB{i:04d}",
+                "run_tag": RUN_TAG,
                 "name": f"TestPublisher_{i}",
                 "address": f"TestAddress_{i}",
                 "country": f"TestCountry_{i % 10}",
@@ -1286,18 +1420,19 @@ def prepare_mongo_test_data(db, size):
                 "phone": f"123-456-{i:04d}"
             }
             publishers_data.append(publisher_data)
-        db.publishers.insert_many(publishers_data)
+        insert_documents('publishers', publishers_data)
 
         authors_data = []
         for i in range(100):
             author_data = {
                 "author_id": f"TESTAUTH{i:04d}",
+                "run_tag": RUN_TAG,
                 "author_name": f"TestAuthor_{i}",
                 "country_of_origin": f"TestCountry_{i % 20}",
                 "birth_date": f"19{50 + i % 50}-01-01"
             }
             authors_data.append(author_data)
-        db.authors.insert_many(authors_data)
+        insert_documents('authors', authors_data)
 
         genre_ids = [doc["id"] for doc in db.genres.find({"genre": {"$regex": "^TestGenre_"}})]
         publisher_ids = [doc["publisher_id"] for doc in db.publishers.find({"name": {"$regex": "^TestPublisher_"}})]
@@ -1307,20 +1442,18 @@ def prepare_mongo_test_data(db, size):
         for i in range(size):
             user_data = {
                 "users_id": 2000000 + i,
+                "run_tag": RUN_TAG,
                 "location": f"TestCity_{i % 100}",
                 "age": str(18 + (i % 62))
             }
             users_data.append(user_data)
-
-        batch_size = 1000
-        for i in range(0, len(users_data), batch_size):
-            batch = users_data[i:i + batch_size]
-            db.users.insert_many(batch)
+        insert_documents('users', users_data)
 
         books_data = []
         for i in range(size):
             book_data = {
                 "isbn": f"TEST-{i:010d}",
+                "run_tag": RUN_TAG,
                 "book_name": f"TestBook_{i}",
                 "year_of_release": 1950 + (i % 74),
                 "genre_id": genre_ids[i % len(genre_ids)],
@@ -1329,9 +1462,7 @@ def prepare_mongo_test_data(db, size):
             }
             books_data.append(book_data)
 
-        for i in range(0, len(books_data), batch_size):
-            batch = books_data[i:i + batch_size]
-            db.books.insert_many(batch)
+        insert_documents('books', books_data)
 
         user_ids = [doc["users_id"] for doc in db.users.find({"location": {"$regex": "^TestCity_"}})]
         book_isbns = [doc["isbn"] for doc in db.books.find({"book_name": {"$regex": "^TestBook_"}})]
@@ -1341,22 +1472,19 @@ def prepare_mongo_test_data(db, size):
             rating_data = {
                 "user_id": user_ids[i % len(user_ids)],
                 "isbn": book_isbns[i % len(book_isbns)],
-                "book_rating": (i % 5) + 1
+                "book_rating": (i % 5) + 1,
+                "run_tag": RUN_TAG
             }
             ratings_data.append(rating_data)
         
         if ratings_data:
-            for i in range(0, len(ratings_data), batch_size):
-                batch = ratings_data[i:i + batch_size]
-                try:
-                    db.ratings.insert_many(batch, ordered=False)
-                except Exception:
-                    pass
+            write_in_batches('ratings', ratings_data, batch_size, insert_ratings, load_stats)
 
         orders_data = []
         for i in range(size // 2):
             order_data = {
                 "order_id": 3000000 + i,
+                "run_tag": RUN_TAG,
                 "isbn": book_isbns[i % len(book_isbns)],
                 "user_id": user_ids[i % len(user_ids)],
                 "order_date": f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}",
@@ -1365,25 +1493,36 @@ def prepare_mongo_test_data(db, size):
             orders_data.append(order_data)
         
         if orders_data:
-            for i in range(0, len(orders_data), batch_size):
-                batch = orders_data[i:i + batch_size]
-                db.orders.insert_many(batch)
+            insert_documents('orders', orders_data)
+
+        create_mongo_indexes(db, index_set)
 
         print(f"Przygotowano dane testowe MongoDB o rozmiarze {size}")
 
     except Exception as e:
         print(f"Błąd podczas przygotowywania danych MongoDB: {e}")
+        raise
+
+
+# Dane testowe zapisane przed wprowadzeniem run_tag rozpoznajemy po wartościach pól.
+UNTAGGED_TEST_DATA = {
+    'orders': {"user_id": {"$gte": 2000000}},
+    'ratings': {"user_id": {"$gte": 2000000}},
+    'books': {"book_name": {"$regex": "^TestBook_"}},
+    'users': {"location": {"$regex": "^TestCity_"}},
+    'authors': {"author_name": {"$regex": "^TestAuthor_"}},
+    'publishers': {"name": {"$regex": "^TestPublisher_"}},
+    'genres': {"genre": {"$regex": "^TestGenre_"}},
+}
 
 
 def cleanup_mongo_test_data(db):
     try:
-        db.orders.delete_many({"user_id": {"$gte": 2000000}})
-        db.ratings.delete_many({"user_id": {"$gte": 2000000}})
-        db.books.delete_many({"book_name": {"$regex": "^TestBook_"}})
-        db.users.delete_many({"location": {"$regex": "^TestCity_"}})
-        db.authors.delete_many({"author_name": {"$regex": "^TestAuthor_"}})
-        db.publishers.delete_many({"name": {"$regex": "^TestPublisher_"}})
-        db.genres.delete_many({"genre": {"$regex": "^TestGenre_"}})
+        for collection_name, query in UNTAGGED_TEST_DATA.items():
+            # Osobne zapytanie po run_tag korzysta z indeksu; w $or z wyrażeniem regularnym
+            # bez indeksu cały warunek wymagałby skanu kolekcji.
+            db[collection_name].delete_many({"run_tag": RUN_TAG})
+            db[collection_name].delete_many(query)
         print("Dane testowe MongoDB zostały wyczyszczone")
     except Exception as e:
         print(f"Błąd podczas czyszczenia danych MongoDB: {e}")
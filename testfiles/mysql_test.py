@@ -4,6 +4,125 @@ import random
 import string
 import time
 import inspect, sys
+import json
+from testfiles.runner import (run_suite, run_batch_sweep, write_in_batches, OperationMeter,
+                              CountingConnection, plan_nodes, LARGE_SCAN_ROWS)
+
+SCHEMA_VERSION = 1
+
+# Bez kluczy obcych: InnoDB nie pozwala usunąć indeksu używanego przez klucz obcy,
+# a indeksy pomocnicze są budowane dopiero po załadowaniu danych.
+SCHEMA_TABLES = [
+    ("Book_Genres", """
+        CREATE TABLE IF NOT EXISTS Book_Genres (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            genre_name VARCHAR(100) NOT NULL,
+            popularity INT
+        )
+    """),
+    ("Publishers", """
+        CREATE TABLE IF NOT EXISTS Publishers (
+            publisher_id VARCHAR(16) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            address VARCHAR(200),
+            country VARCHAR(100),
+            email VARCHAR(100),
+            phone VARCHAR(32)
+        )
+    """),
+    ("Authors", """
+        CREATE TABLE IF NOT EXISTS Authors (
+            author_id VARCHAR(16) PRIMARY KEY,
+            author_name VARCHAR(100) NOT NULL,
+            country_of_origin VARCHAR(100),
+            birth_date DATE
+        )
+    """),
+    ("Books", """
+        CREATE TABLE IF NOT EXISTS Books (
+            ISBN VARCHAR(32) PRIMARY KEY,
+            Book_Name VARCHAR(200) NOT NULL,
+            Year_Of_Release INT,
+            Genre_Id INT,
+            Publisher_id VARCHAR(16),
+            Author_id VARCHAR(16)
+        )
+    """),
+    ("Users", """
+        CREATE TABLE IF NOT EXISTS Users (
+            users_id INT AUTO_INCREMENT PRIMARY KEY,
+            location VARCHAR(100),
+            age INT
+        )
+    """),
+    ("Orders", """
+        CREATE TABLE IF NOT EXISTS Orders (
+            order_id INT AUTO_INCREMENT PRIMARY KEY,
+            ISBN VARCHAR(32),
+            User_ID INT,
+            Order_Date DATE,
+            Order_Cost DECIMAL(10, 2)
+        )
+    """),
+    ("Returns", """
+        CREATE TABLE IF NOT EXISTS Returns (
+            return_id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id INT,
+            return_date DATE,
+            reason_description VARCHAR(255)
+        )
+    """),
+    ("Book_Ratings", """
+        CREATE TABLE IF NOT EXISTS Book_Ratings (
+            rating_id INT AUTO_INCREMENT PRIMARY KEY,
+            User_ID INT,
+            ISBN VARCHAR(32),
+            Book_Rating INT
+        )
+    """),
+]
+
+SECONDARY_INDEXES = [
+    ("idx_users_location", "Users", "location"),
+    ("idx_books_genre_id", "Books", "Genre_Id"),
+    ("idx_orders_user_id", "Orders", "User_ID"),
+    ("idx_book_ratings_isbn", "Book_Ratings", "ISBN"),
+]
+
+# Wydawcy i autorzy mają tekstowe identyfikatory (testy używają random_code, loader 'TESTPUB0000'/'TESTAUTH0000').
+TEXT_ID_COLUMNS = [
+    ("Publishers", "publisher_id"),
+    ("Authors", "author_id"),
+    ("Books", "Publisher_id"),
+    ("Books", "Author_id"),
+]
+TEXT_ID_LENGTH = len("TESTAUTH0000")
+
+# Klucze główne zostają w każdym zestawie - InnoDB i tak przechowuje wiersze
+# w indeksie klastrowym, a AUTO_INCREMENT wymaga klucza - dlatego nie ma zestawu 'none'.
+INDEX_SETS = {
+    'primary': {'secondary': False},
+    'full': {'secondary': True},
+}
+
+ISOLATION_LEVELS = {
+    'default': None,
+    'read_committed': 'READ COMMITTED',
+    'repeatable_read': 'REPEATABLE READ',
+    'serializable': 'SERIALIZABLE',
+}
+
+# ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK
+RETRYABLE_ERRNOS = {1205, 1213}
+
+# innodb_flush_log_at_trx_commit jest wyłącznie zmienną globalną - zmieniamy ją na czas testów
+# i przywracamy poprzednią wartość po zakończeniu.
+DURABILITY_MODES = {
+    'default': {'flush_log_at_trx_commit': None, 'autocommit': False},
+    'durable': {'flush_log_at_trx_commit': 1, 'autocommit': False},
+    'relaxed': {'flush_log_at_trx_commit': 2, 'autocommit': False},
+    'autocommit': {'flush_log_at_trx_commit': 1, 'autocommit': True},
+}
 
 
 @pytest.fixture(scope="module")
@@ -474,7 +593,9 @@ def test_delete_orders_with_user_join(conn):
 # TEST START
 # -----------------------
 
-def mysql_tests():
+def mysql_tests(index_set='full', durability='default', isolation='default', details=None, duration=None,
+                explain=False, profiler=None):
+    connect_start = time.perf_counter()
     conn = mysql.connector.connect(
         host="localhost",
         user="root",
@@ -482,6 +603,9 @@ def mysql_tests():
         database="ZTB_DATABASE",
         auth_plugin='mysql_native_password'
     )
+    connect_time = time.perf_counter() - connect_start
+
+    ensure_schema(conn)
 
     tests = [
         test_insert_book_genre,
@@ -538,77 +662,260 @@ def mysql_tests():
 
     print(f"Znaleziono {len(tests)} testów MySQL")
     print(f"Każdy test będzie uruchomiony {runs_per_test} razy dla każdego z {len(data_sizes)} rozmiarów danych")
+    print(f"Zestaw indeksów: {index_set}")
+    print(f"Tryb trwałości: {durability}")
+    print(f"Poziom izolacji: {isolation}")
 
-    total_start = time.time()
-    individual_results = {}
-    crud_results = {}
-
-    for data_size in data_sizes:
-        individual_results[data_size] = {}
-        crud_results[data_size] = {
-            'CREATE': [],
-            'READ': [],
-            'UPDATE': [],
-            'DELETE': []
-        }
-
-        prepare_test_data(conn, data_size)
-
-        for test in tests:
-            times = []
-            status = "OK"
-            for run in range(runs_per_test):
-                start = time.time()
-                try:
-                    test(conn)
-                    duration = time.time() - start
-                    times.append(duration)
-                except Exception as e:
-                    status = f"ERROR ({e.__class__.__name__})"
-                    break
-
-            if times:
-                avg_time = sum(times) / len(times)
-                test_name = test.__name__
-
-                individual_results[data_size][test_name] = avg_time
-
-                for crud_op, test_names in crud_categories.items():
-                    if test_name in test_names:
-                        crud_results[data_size][crud_op].append(avg_time)
-                        break
+    previous_flush = apply_durability(conn, durability)
+    apply_isolation(conn, isolation)
+    versions = backend_versions(conn)
+    meter = OperationMeter()
 
-        cleanup_test_data(conn)
-
-    final_results = {}
-    for data_size in data_sizes:
-        final_results[data_size] = {}
-        for crud_op in ['CREATE', 'READ', 'UPDATE', 'DELETE']:
-            times = crud_results[data_size][crud_op]
-            if times:
-                final_results[data_size][crud_op] = sum(times)
-            else:
-                final_results[data_size][crud_op] = 0.0
+    def prepare(data_size):
+        load_stats = {}
+        prepare_test_data(conn, data_size, index_set, load_stats=load_stats)
+        return {'index_set': index_set, 'durability': durability, 'isolation': isolation,
+                'ingestion': load_stats, 'versions': versions, 'connect_time': connect_time}
 
-        for test_name, time_val in individual_results[data_size].items():
-            final_results[data_size][test_name] = time_val
+    try:
+        target = CountingConnection(conn, meter)
+        final_results = run_suite('MySQL', target, tests, crud_categories, data_sizes, runs_per_test,
+                                  prepare, lambda: cleanup_test_data(conn), details,
+                                  is_retryable=is_serialization_failure, recover=conn.rollback,
+                                  meter=meter, duration=duration, collect_stats=lambda: server_stats(conn),
+                                  capture_plan=(lambda statement: explain_statement(conn, statement))
+                                  if explain else None, profiler=profiler)
+    finally:
+        if previous_flush is not None:
+            cursor = conn.cursor()
+            cursor.execute("SET GLOBAL innodb_flush_log_at_trx_commit = %s", (previous_flush,))
+            cursor.close()
 
     conn.close()
     return final_results
 
 
-def prepare_test_data(conn, size):
+def mysql_load_benchmark(batch_sizes=(1, 10, 100, 1000, 10000), data_size=10000, index_set='full'):
+    conn = mysql.connector.connect(
+        host="localhost",
+        user="root",
+        password="my-secret-pw",
+        database="ZTB_DATABASE",
+        auth_plugin='mysql_native_password'
+    )
+
+    ensure_schema(conn)
+
+    def load(batch_size, load_stats):
+        prepare_test_data(conn, data_size, index_set, batch_size, load_stats)
+
+    try:
+        results = run_batch_sweep('MySQL', load, batch_sizes)
+    finally:
+        cleanup_test_data(conn)
+        conn.close()
+    return results
+
+
+def backend_versions(conn):
+    return {'server': conn.get_server_info(), 'driver': f"mysql-connector {mysql.connector.__version__}"}
+
+
+def apply_durability(conn, durability):
+    mode = DURABILITY_MODES[durability]
+    conn.autocommit = mode['autocommit']
+    if mode['flush_log_at_trx_commit'] is None:
+        return None
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT @@GLOBAL.innodb_flush_log_at_trx_commit")
+        previous_flush = cursor.fetchone()[0]
+        cursor.execute("SET GLOBAL innodb_flush_log_at_trx_commit = %s", (mode['flush_log_at_trx_commit'],))
+        return previous_flush
+    finally:
+        cursor.close()
+
+
+def apply_isolation(conn, isolation):
+    level = ISOLATION_LEVELS[isolation]
+    if level is not None:
+        cursor = conn.cursor()
+        cursor.execute(f"SET SESSION TRANSACTION ISOLATION LEVEL {level}")
+        cursor.close()
+
+
+MYSQL_DIGEST_STATS = {
+    'statements': 'SUM(COUNT_STAR)',
+    'rows_examined': 'SUM(SUM_ROWS_EXAMINED)',
+    'rows_sent': 'SUM(SUM_ROWS_SENT)',
+    'rows_affected': 'SUM(SUM_ROWS_AFFECTED)',
+    'lock_time_ms': 'SUM(SUM_LOCK_TIME) / 1000000000',
+    'no_index_used': 'SUM(SUM_NO_INDEX_USED)',
+    'tmp_disk_tables': 'SUM(SUM_CREATED_TMP_DISK_TABLES)',
+    'exec_time_ms': 'SUM(SUM_TIMER_WAIT) / 1000000000',
+}
+
+MYSQL_STATUS_STATS = ['Innodb_buffer_pool_read_requests', 'Innodb_buffer_pool_reads',
+                      'Innodb_row_lock_waits', 'Innodb_row_lock_time']
+
+
+def server_stats(conn):
+    stats = {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT {', '.join(MYSQL_DIGEST_STATS.values())} "
+                       f"FROM performance_schema.events_statements_summary_by_digest WHERE SCHEMA_NAME = DATABASE()")
+        digest = cursor.fetchone()
+        if all(value is None for value in digest):
+            # performance_schema jest wyłączone albo nie ma jeszcze żadnych instrukcji w tej bazie.
+            stats['performance_schema'] = 'unavailable'
+        stats.update(zip(MYSQL_DIGEST_STATS, digest))
+        placeholders = ', '.join(['%s'] * len(MYSQL_STATUS_STATS))
+        cursor.execute(f"SHOW GLOBAL STATUS WHERE Variable_name IN ({placeholders})", MYSQL_STATUS_STATS)
+        stats.update((name.lower(), value) for name, value in cursor.fetchall())
+        conn.commit()
+    except mysql.connector.Error as e:
+        conn.rollback()
+        print(f"Nie udało się odczytać statystyk serwera MySQL: {e}")
+        return {}
+    finally:
+        cursor.close()
+    return {name: value if isinstance(value, str) else float(value)
+            for name, value in stats.items() if value is not None}
+
+
+def plan_warnings(plan):
+    warnings = []
+    for node in plan_nodes(plan):
+        if node.get('access_type') == 'ALL':
+            scanned = float(node.get('rows_examined_per_scan', 0))
+            if scanned >= LARGE_SCAN_ROWS:
+                warnings.append(f"pełny skan tabeli {node.get('table_name')} ({scanned:,.0f} wierszy)")
+    return warnings
+
+
+def explain_statement(conn, statement):
+    sql, params = statement
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+        plan = json.loads(cursor.fetchall()[0][0])
+        analyze = None
+        # EXPLAIN ANALYZE wykonuje zapytanie, więc używamy go tylko dla instrukcji czytających.
+        if sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            cursor.execute("EXPLAIN ANALYZE " + sql, params)
+            analyze = "\n".join(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.rollback()
+    return {'statement': sql, 'plan': plan, 'analyze': analyze, 'warnings': plan_warnings(plan)}
+
+
+def is_serialization_failure(error):
+    return isinstance(error, mysql.connector.errors.DatabaseError) and error.errno in RETRYABLE_ERRNOS
+
+
+def ensure_schema(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INT NOT NULL, applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        current_version = cursor.fetchone()[0]
+        # Tworzymy tylko brakujące tabele i indeksy - istniejących danych nigdy nie usuwamy.
+        for _, ddl in SCHEMA_TABLES:
+            cursor.execute(ddl)
+        check_text_id_columns(cursor)
+        existing = existing_secondary_indexes(cursor)
+        for index_name, table_name, column in SECONDARY_INDEXES:
+            if index_name not in existing:
+                cursor.execute(f"CREATE INDEX {index_name} ON {table_name} ({column})")
+        if current_version is None:
+            cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
+        elif current_version != SCHEMA_VERSION:
+            print(f"⚠️ Schemat MySQL ma wersję {current_version}, oczekiwano {SCHEMA_VERSION}; "
+                  f"istniejące tabele nie zostały zmienione")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def check_text_id_columns(cursor):
+    # Istniejące tabele mogą mieć liczbowe identyfikatory - wtedy INSERT IGNORE po cichu zgubiłby dane testowe.
+    mismatched = []
+    for table_name, column in TEXT_ID_COLUMNS:
+        cursor.execute(
+            "SELECT DATA_TYPE, CHARACTER_MAXIMUM_LENGTH FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND LOWER(table_name) = LOWER(%s) AND LOWER(column_name) = LOWER(%s)",
+            (table_name, column)
+        )
+        row = cursor.fetchone()
+        if row is None or row[0] not in ('char', 'varchar') or (row[1] or 0) < TEXT_ID_LENGTH:
+            mismatched.append(f"{table_name}.{column} ({row[0] if row else 'brak kolumny'})")
+    if mismatched:
+        raise RuntimeError(f"Kolumny identyfikatorów muszą być tekstowe (co najmniej VARCHAR({TEXT_ID_LENGTH})): "
+                           f"{', '.join(mismatched)}")
+
+
+def existing_secondary_indexes(cursor):
+    cursor.execute(
+        "SELECT DISTINCT INDEX_NAME FROM information_schema.statistics WHERE table_schema = DATABASE()"
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def drop_secondary_indexes(conn):
+    cursor = conn.cursor()
+    try:
+        existing = existing_secondary_indexes(cursor)
+        for index_name, table_name, _ in SECONDARY_INDEXES:
+            if index_name in existing:
+                cursor.execute(f"DROP INDEX {index_name} ON {table_name}")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def create_secondary_indexes(conn):
+    cursor = conn.cursor()
+    try:
+        start = time.time()
+        existing = existing_secondary_indexes(cursor)
+        for index_name, table_name, column in SECONDARY_INDEXES:
+            if index_name not in existing:
+                cursor.execute(f"CREATE INDEX {index_name} ON {table_name} ({column})")
+        conn.commit()
+        print(f"Utworzono indeksy MySQL w {time.time() - start:.2f}s")
+    finally:
+        cursor.close()
+
+
+def prepare_test_data(conn, size, index_set='full', batch_size=None, load_stats=None):
     cursor = conn.cursor()
     try:
         cleanup_test_data(conn)
+        drop_secondary_indexes(conn)
         print(f"Przygotowywanie {size} rekordów danych testowych...")
 
+        def insert_rows(table, sql, rows):
+            def write_batch(chunk):
+                cursor.executemany(sql, chunk)
+                # Bez rozmiaru partii cały zestaw danych zatwierdzamy jednym commitem na końcu.
+                if batch_size is None:
+                    return 0
+                conn.commit()
+                return 1
+            write_in_batches(table, rows, batch_size, write_batch, load_stats)
+
         genres_data = []
         for i in range(20):
             genre_name = f"TestGenre_{i}"
             popularity = i % 10 + 1
             genres_data.append((genre_name, popularity))
-        cursor.executemany(
+        insert_rows(
+            'book_genres',
             "INSERT IGNORE INTO Book_Genres (genre_name, popularity) VALUES (%s, %s)",
             genres_data
         )
@@ -620,9 +927,11 @@ def prepare_test_data(conn, size):
             country = f"TestCountry_{i % 10}"
             email = f"publisher{i}@test.com"
             phone = f"123-456-{i:04d}"
-            publishers_data.append((name, address, country, email, phone))
-        cursor.executemany(
-            "INSERT IGNORE INTO Publishers (name, address, country, email, phone) VALUES (%s, %s, %s, %s, %s)",
+            publishers_data.append((f"TESTPUB{i:04d}", name, address, country, email, phone))
+        insert_rows(
+            'publishers',
+            "INSERT IGNORE INTO Publishers (publisher_id, name, address, country, email, phone) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
             publishers_data
         )
 
@@ -631,9 +940,10 @@ def prepare_test_data(conn, size):
             author_name = f"TestAuthor_{i}"
             country_of_origin = f"TestCountry_{i % 20}"
             birth_date = f"19{50 + i % 50}-01-01"
-            authors_data.append((author_name, country_of_origin, birth_date))
-        cursor.executemany(
-            "INSERT IGNORE INTO Authors (author_name, country_of_origin, birth_date) VALUES (%s, %s, %s)",
+            authors_data.append((f"TESTAUTH{i:04d}", author_name, country_of_origin, birth_date))
+        insert_rows(
+            'authors',
+            "INSERT IGNORE INTO Authors (author_id, author_name, country_of_origin, birth_date) VALUES (%s, %s, %s, %s)",
             authors_data
         )
 
@@ -649,7 +959,8 @@ def prepare_test_data(conn, size):
             location = f"TestCity_{i % 100}"
             age = 18 + (i % 62)
             users_data.append((location, age))
-        cursor.executemany(
+        insert_rows(
+            'users',
             "INSERT INTO Users (location, age) VALUES (%s, %s)",
             users_data
         )
@@ -666,7 +977,8 @@ def prepare_test_data(conn, size):
             publisher_id = publisher_ids[i % len(publisher_ids)]
             author_id = author_ids[i % len(author_ids)]
             books_data.append((isbn, book_name, year_of_release, genre_id, publisher_id, author_id))
-        cursor.executemany(
+        insert_rows(
+            'books',
             "INSERT INTO Books (ISBN, Book_Name, Year_Of_Release, Genre_Id, Publisher_id, Author_id) VALUES (%s, %s, %s, %s, %s, %s)",
             books_data
         )
@@ -683,7 +995,8 @@ def prepare_test_data(conn, size):
             rating = (i % 5) + 1
             ratings_data.append((user_id, isbn, rating))
         if ratings_data:
-            cursor.executemany(
+            insert_rows(
+                'book_ratings',
                 "INSERT IGNORE INTO Book_Ratings (User_ID, ISBN, Book_Rating) VALUES (%s, %s, %s)",
                 ratings_data
             )
@@ -696,7 +1009,8 @@ def prepare_test_data(conn, size):
             order_cost = round(10.0 + (i % 50), 2)
             orders_data.append((isbn, user_id, order_date, order_cost))
         if orders_data:
-            cursor.executemany(
+            insert_rows(
+                'orders',
                 "INSERT INTO Orders (ISBN, User_ID, Order_Date, Order_Cost) VALUES (%s, %s, %s, %s)",
                 orders_data
             )
@@ -704,9 +1018,14 @@ def prepare_test_data(conn, size):
         conn.commit()
         print(f"Przygotowano dane testowe o rozmiarze {size}")
 
+        # Indeksy budujemy dopiero po udanym załadowaniu danych.
+        if INDEX_SETS[index_set]['secondary']:
+            create_secondary_indexes(conn)
+
     except Exception as e:
         print(f"Błąd podczas przygotowywania danych: {e}")
         conn.rollback()
+        raise
     finally:
         cursor.close()
 
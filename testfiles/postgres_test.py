@@ -4,6 +4,118 @@ import random
 import string
 import time
 import inspect, sys
+from testfiles.runner import (run_suite, run_batch_sweep, write_in_batches, OperationMeter,
+                              CountingConnection, plan_nodes, LARGE_SCAN_ROWS)
+
+SCHEMA_VERSION = 1
+
+SCHEMA_TABLES = [
+    ("book_genres", """
+        CREATE TABLE IF NOT EXISTS book_genres (
+            id SERIAL PRIMARY KEY,
+            genre VARCHAR(100) NOT NULL,
+            popularity INTEGER
+        )
+    """),
+    ("publishers", """
+        CREATE TABLE IF NOT EXISTS publishers (
+            publisher_id SERIAL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            address VARCHAR(200),
+            country VARCHAR(100),
+            mail VARCHAR(100),
+            phone VARCHAR(32)
+        )
+    """),
+    ("authors", """
+        CREATE TABLE IF NOT EXISTS authors (
+            author_id SERIAL PRIMARY KEY,
+            author_name VARCHAR(100) NOT NULL,
+            country_of_origin VARCHAR(100),
+            birth_date DATE
+        )
+    """),
+    ("books", """
+        CREATE TABLE IF NOT EXISTS books (
+            isbn VARCHAR(32) PRIMARY KEY,
+            book_name VARCHAR(200) NOT NULL,
+            year_of_release INTEGER,
+            genre_id INTEGER,
+            publisher_id INTEGER,
+            author_id INTEGER
+        )
+    """),
+    ("users", """
+        CREATE TABLE IF NOT EXISTS users (
+            users_id SERIAL PRIMARY KEY,
+            location VARCHAR(100),
+            age INTEGER
+        )
+    """),
+    ("orders", """
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id SERIAL PRIMARY KEY,
+            isbn VARCHAR(32),
+            user_id INTEGER,
+            order_date DATE,
+            price NUMERIC(10, 2)
+        )
+    """),
+    ("returns", """
+        CREATE TABLE IF NOT EXISTS returns (
+            return_id SERIAL PRIMARY KEY,
+            order_id INTEGER,
+            return_date DATE,
+            reason_description VARCHAR(255)
+        )
+    """),
+    ("book_ratings", """
+        CREATE TABLE IF NOT EXISTS book_ratings (
+            rating_id SERIAL PRIMARY KEY,
+            user_id INTEGER,
+            isbn VARCHAR(32),
+            book_rating INTEGER
+        )
+    """),
+]
+
+SECONDARY_INDEXES = [
+    ("idx_users_location", "users", "location"),
+    ("idx_books_genre_id", "books", "genre_id"),
+    ("idx_orders_user_id", "orders", "user_id"),
+    ("idx_book_ratings_isbn", "book_ratings", "isbn"),
+]
+
+PRIMARY_KEYS = [
+    ("book_genres", "id"),
+    ("publishers", "publisher_id"),
+    ("authors", "author_id"),
+    ("books", "isbn"),
+    ("users", "users_id"),
+    ("orders", "order_id"),
+    ("returns", "return_id"),
+    ("book_ratings", "rating_id"),
+]
+
+INDEX_SETS = {
+    'none': {'primary_keys': False, 'secondary': False},
+    'primary': {'primary_keys': True, 'secondary': False},
+    'full': {'primary_keys': True, 'secondary': True},
+}
+
+ISOLATION_LEVELS = {
+    'default': None,
+    'read_committed': 'READ COMMITTED',
+    'repeatable_read': 'REPEATABLE READ',
+    'serializable': 'SERIALIZABLE',
+}
+
+DURABILITY_MODES = {
+    'default': {'synchronous_commit': None, 'autocommit': False},
+    'durable': {'synchronous_commit': 'on', 'autocommit': False},
+    'relaxed': {'synchronous_commit': 'off', 'autocommit': False},
+    'autocommit': {'synchronous_commit': 'on', 'autocommit': True},
+}
 
 
 @pytest.fixture(scope="module")
@@ -714,7 +826,9 @@ def test_delete_orders_with_user_join(conn):
     # -----------------------
 
 
-def postgresql_tests():
+def postgresql_tests(index_set='full', durability='default', isolation='default', details=None, duration=None,
+                     explain=False, profiler=None):
+    connect_start = time.perf_counter()
     conn = psycopg2.connect(
         host="localhost",
         user="postgres",
@@ -722,6 +836,9 @@ def postgresql_tests():
         database="postgres",
         port="5432"
     )
+    connect_time = time.perf_counter() - connect_start
+
+    ensure_schema(conn)
 
     tests = [
         test_insert_book_genre,
@@ -777,80 +894,274 @@ def postgresql_tests():
     runs_per_test = 5
 
     print(f"Znaleziono {len(tests)} testów PostgreSQL")
+    print(f"Zestaw indeksów: {index_set}")
+    print(f"Tryb trwałości: {durability}")
+    print(f"Poziom izolacji: {isolation}")
+
+    apply_durability(conn, durability)
+    apply_isolation(conn, isolation)
+    versions = backend_versions(conn)
+    meter = OperationMeter()
+
+    def prepare(data_size):
+        load_stats = {}
+        prepare_test_data(conn, data_size, index_set, load_stats=load_stats)
+        return {'index_set': index_set, 'durability': durability, 'isolation': isolation,
+                'ingestion': load_stats, 'versions': versions, 'connect_time': connect_time}
+
+    target = CountingConnection(conn, meter)
+    try:
+        final_results = run_suite('PostgreSQL', target, tests, crud_categories, data_sizes, runs_per_test,
+                                  prepare, lambda: cleanup_test_data(conn), details,
+                                  is_retryable=is_serialization_failure, recover=conn.rollback,
+                                  meter=meter, duration=duration, collect_stats=lambda: server_stats(conn),
+                                  capture_plan=(lambda statement: explain_statement(conn, statement))
+                                  if explain else None, profiler=profiler)
+    finally:
+        restore_primary_keys(conn, index_set)
+        conn.close()
+    return final_results
 
-    total_start = time.time()
-    individual_results = {}
-    crud_results = {}
-
-    for data_size in data_sizes:
-        individual_results[data_size] = {}
-        crud_results[data_size] = {
-            'CREATE': [],
-            'READ': [],
-            'UPDATE': [],
-            'DELETE': []
-        }
-
-        prepare_test_data(conn, data_size)
-
-        for test in tests:
-            times = []
-            status = "OK"
-            for run in range(runs_per_test):
-                start = time.time()
-                try:
-                    test(conn)
-                    duration = time.time() - start
-                    times.append(duration)
-                except Exception as e:
-                    status = f"ERROR ({e.__class__.__name__})"
-                    break
-
-            if times:
-                avg_time = sum(times) / len(times)
-                test_name = test.__name__
-
-                individual_results[data_size][test_name] = avg_time
-
-                for crud_op, test_names in crud_categories.items():
-                    if test_name in test_names:
-                        crud_results[data_size][crud_op].append(avg_time)
-                        break
 
+def postgresql_load_benchmark(batch_sizes=(1, 10, 100, 1000, 10000), data_size=10000, index_set='full'):
+    conn = psycopg2.connect(
+        host="localhost",
+        user="postgres",
+        password="my-secret-password",
+        database="postgres",
+        port="5432"
+    )
+
+    ensure_schema(conn)
+
+    def load(batch_size, load_stats):
+        prepare_test_data(conn, data_size, index_set, batch_size, load_stats)
+
+    try:
+        results = run_batch_sweep('PostgreSQL', load, batch_sizes)
+    finally:
         cleanup_test_data(conn)
+        restore_primary_keys(conn, index_set)
+        conn.close()
+    return results
 
-    final_results = {}
-    for data_size in data_sizes:
-        final_results[data_size] = {}
-        for crud_op in ['CREATE', 'READ', 'UPDATE', 'DELETE']:
-            times = crud_results[data_size][crud_op]
-            if times:
-                final_results[data_size][crud_op] = sum(times)
-            else:
-                final_results[data_size][crud_op] = 0.0
 
-        for test_name, time_val in individual_results[data_size].items():
-            final_results[data_size][test_name] = time_val
+def backend_versions(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SHOW server_version")
+        server_version = cursor.fetchone()[0]
+        conn.commit()
+    finally:
+        cursor.close()
+    return {'server': server_version, 'driver': f"psycopg2 {psycopg2.__version__}"}
 
-    conn.close()
-    return final_results
+
+def apply_durability(conn, durability):
+    mode = DURABILITY_MODES[durability]
+    conn.rollback()
+    conn.autocommit = mode['autocommit']
+    if mode['synchronous_commit'] is not None:
+        cursor = conn.cursor()
+        cursor.execute(f"SET synchronous_commit TO {mode['synchronous_commit']}")
+        conn.commit()
+        cursor.close()
+
+
+def apply_isolation(conn, isolation):
+    level = ISOLATION_LEVELS[isolation]
+    if level is not None:
+        conn.rollback()
+        conn.set_session(isolation_level=level)
+
+
+# PostgreSQL nie udostępnia skumulowanego licznika oczekiwań na blokady (odpowiednika Innodb_row_lock_waits).
+# pg_locks i pg_stat_activity pokazują tylko stan chwilowy, a migawki robimy między testami, gdy jedyne
+# połączenie testu nie czeka na blokadę - różnica zawsze wynosiłaby 0. Jedynym licznikiem blokad są deadlocks.
+PG_DATABASE_STATS = ['xact_commit', 'xact_rollback', 'blks_read', 'blks_hit', 'tup_returned', 'tup_fetched',
+                     'tup_inserted', 'tup_updated', 'tup_deleted', 'temp_bytes', 'deadlocks']
+
+PG_STATEMENT_STATS = {
+    'statements': 'sum(calls)',
+    'statement_rows': 'sum(rows)',
+    'shared_blks_hit': 'sum(shared_blks_hit)',
+    'shared_blks_read': 'sum(shared_blks_read)',
+    'exec_time_ms': 'sum(total_exec_time)',
+}
 
 
-def prepare_test_data(conn, size):
+def server_stats(conn):
+    # pg_stat_database jest aktualizowane z opóźnieniem (do ~1s), więc przy bardzo krótkich testach
+    # część licznika może trafić do kolejnego testu.
+    stats = {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(f"SELECT {', '.join(PG_DATABASE_STATS)} FROM pg_stat_database "
+                       f"WHERE datname = current_database()")
+        stats.update(zip(PG_DATABASE_STATS, cursor.fetchone()))
+        conn.commit()
+        try:
+            cursor.execute(f"SELECT {', '.join(PG_STATEMENT_STATS.values())} FROM pg_stat_statements "
+                           f"WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())")
+            stats.update(zip(PG_STATEMENT_STATS, cursor.fetchone()))
+            conn.commit()
+        except psycopg2.Error:
+            # Rozszerzenie pg_stat_statements nie jest zainstalowane - zaznaczamy brak zamiast pomijać liczniki.
+            conn.rollback()
+            stats['pg_stat_statements'] = 'unavailable'
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Nie udało się odczytać statystyk serwera PostgreSQL: {e}")
+        return {}
+    finally:
+        cursor.close()
+    return {name: value if isinstance(value, str) else float(value)
+            for name, value in stats.items() if value is not None}
+
+
+def plan_warnings(plan):
+    warnings = []
+    for node in plan_nodes(plan):
+        if node.get('Node Type') == 'Seq Scan':
+            scanned = node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0)
+            if scanned >= LARGE_SCAN_ROWS:
+                warnings.append(f"Seq Scan na {node.get('Relation Name')} ({scanned:,.0f} wierszy)")
+    return warnings
+
+
+def explain_statement(conn, statement):
+    sql, params = statement
+    # EXPLAIN ANALYZE wykonuje instrukcję, więc zawsze ją wycofujemy - także w trybie autocommit.
+    autocommit = conn.autocommit
+    conn.autocommit = False
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.autocommit = autocommit
+    return {'statement': sql, 'plan': plan, 'warnings': plan_warnings(plan)}
+
+
+def is_serialization_failure(error):
+    return isinstance(error, psycopg2.extensions.TransactionRollbackError)
+
+
+def ensure_schema(conn):
+    cursor = conn.cursor()
+    try:
+        conn.rollback()
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER NOT NULL, applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        current_version = cursor.fetchone()[0]
+        # Tworzymy tylko brakujące tabele i indeksy - istniejących danych nigdy nie usuwamy.
+        for _, ddl in SCHEMA_TABLES:
+            cursor.execute(ddl)
+        for index_name, table_name, column in SECONDARY_INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column})")
+        if current_version is None:
+            cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
+        elif current_version != SCHEMA_VERSION:
+            print(f"⚠️ Schemat PostgreSQL ma wersję {current_version}, oczekiwano {SCHEMA_VERSION}; "
+                  f"istniejące tabele nie zostały zmienione")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def drop_secondary_indexes(conn):
+    cursor = conn.cursor()
+    try:
+        for index_name, _, _ in SECONDARY_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def drop_primary_keys(conn):
+    cursor = conn.cursor()
+    try:
+        for table_name, _ in PRIMARY_KEYS:
+            cursor.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT IF EXISTS {table_name}_pkey")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def create_primary_keys(conn):
+    cursor = conn.cursor()
+    try:
+        for table_name, column in PRIMARY_KEYS:
+            cursor.execute("SELECT 1 FROM pg_constraint WHERE conname = %s", (f"{table_name}_pkey",))
+            if cursor.fetchone() is None:
+                cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_pkey PRIMARY KEY ({column})")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def restore_primary_keys(conn, index_set):
+    # Zestaw 'none' usuwa klucze główne z tabel w bazie, więc po przebiegu (również przerwanym)
+    # przywracamy je - najpierw usuwając dane testowe, które mogłyby naruszyć unikalność.
+    if INDEX_SETS[index_set]['primary_keys']:
+        return
+    cleanup_test_data(conn)
+    create_primary_keys(conn)
+    print("🔑 Przywrócono klucze główne tabel PostgreSQL")
+
+
+def create_secondary_indexes(conn):
+    cursor = conn.cursor()
+    try:
+        start = time.time()
+        for index_name, table_name, column in SECONDARY_INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column})")
+        conn.commit()
+        print(f"Utworzono indeksy PostgreSQL w {time.time() - start:.2f}s")
+    finally:
+        cursor.close()
+
+
+def prepare_test_data(conn, size, index_set='full', batch_size=None, load_stats=None):
+    indexes = INDEX_SETS[index_set]
     cursor = conn.cursor()
     try:
         conn.rollback()
         cleanup_test_data(conn)
         conn.commit()
+        drop_secondary_indexes(conn)
+        if not indexes['primary_keys']:
+            drop_primary_keys(conn)
 
         print(f"Przygotowywanie {size} rekordów danych testowych...")
 
+        def insert_rows(table, sql, rows):
+            def write_batch(chunk):
+                cursor.executemany(sql, chunk)
+                # Bez rozmiaru partii cały zestaw danych zatwierdzamy jednym commitem na końcu.
+                if batch_size is None:
+                    return 0
+                conn.commit()
+                return 1
+            write_in_batches(table, rows, batch_size, write_batch, load_stats)
+
         genres_data = []
         for i in range(20):
             genre_name = f"TestGenre_{i}"
             popularity = i % 10 + 1
             genres_data.append((genre_name, popularity))
-        cursor.executemany(
+        insert_rows(
+            'book_genres',
             "INSERT INTO book_genres (genre, popularity) VALUES (%s, %s)",
             genres_data
         )
@@ -863,7 +1174,8 @@ def prepare_test_data(conn, size):
             mail = f"publisher{i}@test.com"
             phone = f"123-456-{i:04d}"
             publishers_data.append((name, address, country, mail, phone))
-        cursor.executemany(
+        insert_rows(
+            'publishers',
             "INSERT INTO publishers (name, address, country, mail, phone) VALUES (%s, %s, %s, %s, %s)",
             publishers_data
         )
@@ -874,7 +1186,8 @@ def prepare_test_data(conn, size):
             country_of_origin = f"TestCountry_{i % 20}"
             birth_date = f"19{50 + i % 50}-01-01"
             authors_data.append((author_name, country_of_origin, birth_date))
-        cursor.executemany(
+        insert_rows(
+            'authors',
             "INSERT INTO authors (author_name, country_of_origin, birth_date) VALUES (%s, %s, %s)",
             authors_data
         )
@@ -899,7 +1212,8 @@ def prepare_test_data(conn, size):
             location = f"TestCity_{i % 100}"
             age = 18 + (i % 62)
             users_data.append((location, age))
-        cursor.executemany(
+        insert_rows(
+            'users',
             "INSERT INTO users (location, age) VALUES (%s, %s)",
             users_data
         )
@@ -918,7 +1232,8 @@ def prepare_test_data(conn, size):
             publisher_id = publisher_ids[i % len(publisher_ids)]
             author_id = author_ids[i % len(author_ids)]
             books_data.append((isbn, book_name, year_of_release, genre_id, publisher_id, author_id))
-        cursor.executemany(
+        insert_rows(
+            'books',
             "INSERT INTO books (isbn, book_name, year_of_release, genre_id, publisher_id, author_id) VALUES (%s, %s, %s, %s, %s, %s)",
             books_data
         )
@@ -935,7 +1250,8 @@ def prepare_test_data(conn, size):
             rating = (i % 5) + 1
             ratings_data.append((user_id, isbn, rating))
         if ratings_data:
-            cursor.executemany(
+            insert_rows(
+                'book_ratings',
                 "INSERT INTO book_ratings (user_id, isbn, book_rating) VALUES (%s, %s, %s) ON CONFLICT DO NOTHING",
                 ratings_data
             )
@@ -948,16 +1264,24 @@ def prepare_test_data(conn, size):
             price = round(10.0 + (i % 50), 2)
             orders_data.append((isbn, user_id, order_date, price))
         if orders_data:
-            cursor.executemany(
+            insert_rows(
+                'orders',
                 "INSERT INTO orders (isbn, user_id, order_date, price) VALUES (%s, %s, %s, %s)",
                 orders_data
             )
 
         conn.commit()
         print(f"Przygotowano dane testowe o rozmiarze {size}")
+
+        # Indeksy budujemy dopiero po udanym załadowaniu danych.
+        if indexes['primary_keys']:
+            create_primary_keys(conn)
+        if indexes['secondary']:
+            create_secondary_indexes(conn)
     except Exception as e:
         print(f"Błąd podczas przygotowywania danych: {e}")
         conn.rollback()
+        raise
     finally:
         cursor.close()
 
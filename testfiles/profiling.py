@@ -0,0 +1,158 @@
+import cProfile
+import os
+import pstats
+import signal
+import sys
+import threading
+from collections import Counter
+
+PROFILE_MODES = ('sampling', 'cprofile')
+DEFAULT_PROFILE_DIR = 'profiles'
+SAMPLE_INTERVAL = 0.001
+TOP_FUNCTIONS = 30
+
+
+def frame_label(code):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, root=None):
+    labels = []
+    while frame is not None and frame is not root:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    def __init__(self, on_sample, interval=SAMPLE_INTERVAL):
+        self.on_sample = on_sample
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+        self._previous_handler = None
+
+    def start(self):
+        # SIGPROF liczy czas procesora klienta i przerywa wątek główny między instrukcjami kodu bajtowego,
+        # więc próbki nie skupiają się w miejscach zwalniania GIL (np. w wywołaniach sterownika).
+        if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+            self._previous_handler = signal.signal(signal.SIGPROF, self._handle_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._target = threading.get_ident()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_thread, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+        else:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _handle_signal(self, signum, frame):
+        self.on_sample(frame)
+
+    def _sample_thread(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self.on_sample(frame)
+
+
+class HarnessProfiler:
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, mode='sampling', tests=None, interval=SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Nieznany tryb profilowania: {mode} (dostępne: {', '.join(PROFILE_MODES)})")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.tests = tests
+        self.interval = interval
+        self.profiles = {}
+        self._sampler = None
+        self._current = None
+
+    def wants(self, test_name):
+        return not self.tests or any(pattern in test_name for pattern in self.tests)
+
+    def start(self):
+        # Próbnik działa przez cały przebieg: pojedyncze wywołanie testu często zużywa mniej niż
+        # jeden interwał czasu procesora, więc uzbrajany osobno dla każdego wywołania nie dałby próbek.
+        if self.mode == 'sampling' and self._sampler is None:
+            self._sampler = StackSampler(self._record_sample, self.interval)
+            self._sampler.start()
+
+    def stop(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+    def _record_sample(self, frame):
+        current = self._current
+        if current is None:
+            return
+        key, root = current
+        stack = collapse_stack(frame, root)
+        if stack:
+            self.profiles.setdefault(key, Counter())[stack] += 1
+
+    def run(self, label, data_size, test_name, call):
+        if not self.wants(test_name):
+            return call()
+
+        key = (label, data_size, test_name)
+        if self.mode == 'cprofile':
+            profile = self.profiles.setdefault(key, cProfile.Profile())
+            profile.enable()
+            try:
+                return call()
+            finally:
+                profile.disable()
+
+        self.start()
+        self.profiles.setdefault(key, Counter())
+        # Próbki poza wywołaniami testów (ładowanie danych, czyszczenie) są pomijane; ramka tej funkcji
+        # jest korzeniem stosu, więc stos zaczyna się od kodu testu.
+        self._current = (key, sys._getframe())
+        try:
+            return call()
+        finally:
+            self._current = None
+
+    def write(self):
+        self.stop()
+        written = []
+        combined = Counter()
+        for (label, data_size, test_name), profile in self.profiles.items():
+            directory = os.path.join(self.output_dir, label, str(data_size))
+            os.makedirs(directory, exist_ok=True)
+            base = os.path.join(directory, test_name)
+
+            if self.mode == 'cprofile':
+                profile.dump_stats(base + '.prof')
+                with open(base + '.txt', 'w') as f:
+                    pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+                written.extend([base + '.prof', base + '.txt'])
+            else:
+                write_collapsed(base + '.collapsed', profile)
+                written.append(base + '.collapsed')
+                combined.update({f"{label};{data_size};{test_name};{stack}": count
+                                 for stack, count in profile.items()})
+
+        if self.mode == 'sampling':
+            path = os.path.join(self.output_dir, 'all.collapsed')
+            write_collapsed(path, combined)
+            written.append(path)
+        return written
+
+
+def write_collapsed(path, stacks):
+    # Format "ramka;ramka;ramka liczba" przyjmowany przez flamegraph.pl i speedscope.
+    with open(path, 'w') as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+
+# Powyżej tej liczby próbek w grupie rozkład dokładny zastępujemy przybliżeniem normalnym.
+EXACT_MAX_SAMPLES = 20
+
+
+def rankdata(values):
+    values = np.asarray(values, dtype=float)
+    sorter = np.argsort(values, kind='mergesort')
+    ranks = np.empty(len(values))
+    ranks[sorter] = np.arange(1, len(values) + 1)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    return (np.bincount(inverse, weights=ranks) / counts)[inverse]
+
+
+def exact_u_distribution(n1, n2):
+    # f(i, j, u) = f(i - 1, j, u) + f(i, j - 1, u - i)
+    previous = [np.ones(1) for _ in range(n2 + 1)]
+    for i in range(1, n1 + 1):
+        current = [np.ones(1)]
+        for j in range(1, n2 + 1):
+            dist = np.zeros(i * j + 1)
+            without_x = previous[j]
+            without_y = current[j - 1]
+            dist[:len(without_x)] += without_x
+            dist[i:i + len(without_y)] += without_y
+            current.append(dist)
+        previous = current
+    return previous[n2]
+
+
+def mann_whitney_u(baseline, candidate):
+    x = np.asarray(baseline, dtype=float)
+    y = np.asarray(candidate, dtype=float)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return 0.0, 1.0
+
+    combined = np.concatenate([x, y])
+    ranks = rankdata(combined)
+    u = ranks[n1:].sum() - n2 * (n2 + 1) / 2
+
+    _, counts = np.unique(combined, return_counts=True)
+    if np.all(counts == 1) and n1 <= EXACT_MAX_SAMPLES and n2 <= EXACT_MAX_SAMPLES:
+        dist = exact_u_distribution(n1, n2)
+        p_value = dist[int(round(u)):].sum() / dist.sum()
+        return float(u), float(p_value)
+
+    n = n1 + n2
+    tie_term = (counts ** 3 - counts).sum() / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return float(u), 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return float(u), float(0.5 * math.erfc(z / math.sqrt(2)))
+
+
+def collect_samples(runs):
+    samples = {}
+    for run in runs:
+        for backend, db_details in run['details'].items():
+            for data_size, size_details in db_details.items():
+                for test_name, times in size_details.get('samples', {}).items():
+                    samples.setdefault((backend, data_size, test_name), []).extend(times)
+    return samples
+
+
+def compare_runs(baseline_runs, candidate_run, alpha=0.05, threshold=0.10):
+    baseline_samples = collect_samples(baseline_runs)
+    candidate_samples = collect_samples([candidate_run])
+
+    findings = []
+    for key, candidate_times in sorted(candidate_samples.items()):
+        baseline_times = baseline_samples.get(key)
+        if not baseline_times or not candidate_times:
+            continue
+
+        baseline_median = float(np.median(baseline_times))
+        candidate_median = float(np.median(candidate_times))
+        change = candidate_median / baseline_median - 1 if baseline_median > 0 else 0.0
+        _, p_slower = mann_whitney_u(baseline_times, candidate_times)
+        _, p_faster = mann_whitney_u(candidate_times, baseline_times)
+
+        status = 'ok'
+        if p_slower < alpha and change > threshold:
+            status = 'regression'
+        elif p_faster < alpha and change < -threshold:
+            status = 'improvement'
+
+        backend, data_size, test_name = key
+        findings.append({
+            'backend': backend,
+            'data_size': data_size,
+            'test_name': test_name,
+            'baseline_median': baseline_median,
+            'candidate_median': candidate_median,
+            'change': change,
+            'p_value': p_slower if change >= 0 else p_faster,
+            'baseline_samples': len(baseline_times),
+            'candidate_samples': len(candidate_times),
+            'status': status,
+        })
+    return findings
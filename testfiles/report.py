@@ -0,0 +1,123 @@
+import base64
+import html
+import json
+
+REPORT_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; margin: 2em auto; max-width: 1200px; color: #222; }
+h1, h2 { color: #2E86AB; }
+table { border-collapse: collapse; margin: 1em 0; font-size: 0.9em; }
+th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: right; }
+th { background: #4CAF50; color: white; cursor: pointer; user-select: none; }
+th.asc::after { content: " ▲"; }
+th.desc::after { content: " ▼"; }
+td:first-child, th:first-child { text-align: left; }
+dl { display: grid; grid-template-columns: max-content auto; gap: 2px 1em; }
+dt { font-weight: bold; }
+dd { margin: 0; font-family: monospace; white-space: pre-wrap; }
+details { border: 1px solid #ddd; border-radius: 4px; margin: 0.5em 0; padding: 0.5em; }
+summary { cursor: pointer; font-weight: bold; }
+img { max-width: 100%; margin: 0.5em 0; display: block; }
+"""
+
+REPORT_SCRIPT = """
+document.querySelectorAll('table.sortable th').forEach(function (th, column) {
+  th.addEventListener('click', function () {
+    var table = th.closest('table');
+    var body = table.tBodies[0];
+    var ascending = !th.classList.contains('asc');
+    table.querySelectorAll('th').forEach(function (other) { other.classList.remove('asc', 'desc'); });
+    th.classList.add(ascending ? 'asc' : 'desc');
+    var value = function (row) {
+      var cell = row.cells[column];
+      var key = cell.dataset.sort !== undefined ? cell.dataset.sort : cell.textContent;
+      var number = parseFloat(key);
+      return isNaN(number) ? key : number;
+    };
+    Array.from(body.rows).sort(function (a, b) {
+      var x = value(a), y = value(b);
+      return (x < y ? -1 : x > y ? 1 : 0) * (ascending ? 1 : -1);
+    }).forEach(function (row) { body.appendChild(row); });
+  });
+});
+document.querySelectorAll('details').forEach(function (details) {
+  details.addEventListener('toggle', function () {
+    details.querySelectorAll('img[data-src]').forEach(function (img) {
+      img.src = img.dataset.src;
+      img.removeAttribute('data-src');
+    });
+  });
+});
+"""
+
+
+def image_tag(data, alt, deferred=False):
+    src = 'data:image/png;base64,' + base64.b64encode(data).decode('ascii')
+    # Obrazy w zwiniętych sekcjach dekodujemy dopiero po ich rozwinięciu.
+    attribute = 'data-src' if deferred else 'loading="lazy" src'
+    return f'<img {attribute}="{src}" alt="{html.escape(alt)}">'
+
+
+def table_html(headers, rows):
+    parts = ['<table class="sortable"><thead><tr>']
+    parts.extend(f'<th>{html.escape(str(header))}</th>' for header in headers)
+    parts.append('</tr></thead><tbody>')
+    for row in rows:
+        parts.append('<tr>')
+        for cell in row:
+            text, sort_key = cell if isinstance(cell, tuple) else (cell, None)
+            sort_attribute = '' if sort_key is None else f' data-sort="{html.escape(str(sort_key))}"'
+            parts.append(f'<td{sort_attribute}>{html.escape(str(text))}</td>')
+        parts.append('</tr>')
+    parts.append('</tbody></table>')
+    return ''.join(parts)
+
+
+def metadata_html(run):
+    entries = [
+        ('Przebieg', run.get('run_id')),
+        ('Rozpoczęty', run.get('started_at')),
+        ('Rewizja git', run.get('git_revision') or '-'),
+        ('Konfiguracja', json.dumps(run.get('config', {}), indent=2, ensure_ascii=False)),
+        ('Host', json.dumps(run.get('host', {}), indent=2, ensure_ascii=False)),
+        ('Wersje backendów', json.dumps(run.get('backend_versions', {}), indent=2, ensure_ascii=False)),
+    ]
+    return '<dl>' + ''.join(f'<dt>{html.escape(label)}</dt><dd>{html.escape(str(value))}</dd>'
+                            for label, value in entries) + '</dl>'
+
+
+def plan_html(label, plan):
+    text = json.dumps(plan.get('plan'), indent=2, ensure_ascii=False, default=str)
+    if plan.get('analyze'):
+        text += '\n\n' + plan['analyze']
+    return (f'<details><summary>Plan zapytania – {html.escape(label)}</summary>'
+            f'<pre>{html.escape(plan.get("statement", ""))}</pre><pre>{html.escape(text)}</pre></details>')
+
+
+def build_report(run, summary_headers, summary_rows, test_sections, chart_sections):
+    parts = [
+        '<!DOCTYPE html><html lang="pl"><head><meta charset="utf-8">',
+        f'<title>Raport wydajności baz danych – {html.escape(str(run.get("run_id")))}</title>',
+        f'<style>{REPORT_STYLE}</style></head><body>',
+        '<h1>Raport wydajności baz danych</h1>',
+        '<h2>Metadane przebiegu</h2>',
+        metadata_html(run),
+        '<h2>Podsumowanie CRUD</h2>',
+        table_html(summary_headers, summary_rows),
+    ]
+
+    for title, charts in chart_sections:
+        if not charts:
+            continue
+        parts.append(f'<h2>{html.escape(title)}</h2>')
+        parts.extend(image_tag(data, filename) for filename, data in charts)
+
+    parts.append('<h2>Szczegóły testów</h2>')
+    for test_name, headers, rows, charts, plans in test_sections:
+        parts.append(f'<details><summary>{html.escape(test_name)}</summary>')
+        parts.append(table_html(headers, rows))
+        parts.extend(image_tag(data, filename, deferred=True) for filename, data in charts)
+        parts.extend(plan_html(label, plan) for label, plan in plans)
+        parts.append('</details>')
+
+    parts.append(f'<script>{REPORT_SCRIPT}</script></body></html>')
+    return '\n'.join(parts)
@@ -0,0 +1,178 @@
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import uuid
+from datetime import datetime
+
+DEFAULT_STORE_PATH = 'benchmark_results.sqlite'
+
+STORE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        started_at TEXT NOT NULL,
+        git_revision TEXT,
+        config TEXT,
+        host TEXT,
+        backend_versions TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        run_id TEXT NOT NULL,
+        backend TEXT NOT NULL,
+        data_size INTEGER NOT NULL,
+        test_name TEXT NOT NULL,
+        seconds REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS samples (
+        run_id TEXT NOT NULL,
+        backend TEXT NOT NULL,
+        data_size INTEGER NOT NULL,
+        test_name TEXT NOT NULL,
+        iteration INTEGER NOT NULL,
+        seconds REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS details (
+        run_id TEXT NOT NULL,
+        backend TEXT NOT NULL,
+        data_size INTEGER NOT NULL,
+        payload TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_samples_run ON samples (run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_details_run ON details (run_id)",
+]
+
+
+def connect_store(path=DEFAULT_STORE_PATH):
+    conn = sqlite3.connect(path)
+    for ddl in STORE_SCHEMA:
+        conn.execute(ddl)
+    conn.commit()
+    return conn
+
+
+def git_revision():
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def host_info():
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def save_run(results, details, config=None, path=DEFAULT_STORE_PATH):
+    run_id = uuid.uuid4().hex
+    backend_versions = {}
+    for db_name, db_details in details.items():
+        for size_details in db_details.values():
+            if 'versions' in size_details:
+                backend_versions[db_name] = size_details['versions']
+
+    conn = connect_store(path)
+    try:
+        conn.execute(
+            "INSERT INTO runs (run_id, started_at, git_revision, config, host, backend_versions) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, datetime.now().isoformat(timespec='seconds'), git_revision(),
+             json.dumps(config or {}), json.dumps(host_info()), json.dumps(backend_versions))
+        )
+        for db_name, db_data in results.items():
+            for data_size, size_data in db_data.items():
+                conn.executemany(
+                    "INSERT INTO results (run_id, backend, data_size, test_name, seconds) VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, db_name, data_size, test_name, value) for test_name, value in size_data.items()]
+                )
+        for db_name, db_details in details.items():
+            for data_size, size_details in db_details.items():
+                for test_name, times in size_details.get('samples', {}).items():
+                    conn.executemany(
+                        "INSERT INTO samples (run_id, backend, data_size, test_name, iteration, seconds) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(run_id, db_name, data_size, test_name, iteration, value)
+                         for iteration, value in enumerate(times)]
+                    )
+                payload = {key: value for key, value in size_details.items() if key != 'samples'}
+                conn.execute(
+                    "INSERT INTO details (run_id, backend, data_size, payload) VALUES (?, ?, ?, ?)",
+                    (run_id, db_name, data_size, json.dumps(payload, default=str))
+                )
+        conn.commit()
+    finally:
+        conn.close()
+    return run_id
+
+
+def _run_metadata(row):
+    run_id, started_at, revision, config, host, backend_versions = row
+    return {
+        'run_id': run_id,
+        'started_at': started_at,
+        'git_revision': revision,
+        'config': json.loads(config or '{}'),
+        'host': json.loads(host or '{}'),
+        'backend_versions': json.loads(backend_versions or '{}'),
+    }
+
+
+def list_runs(path=DEFAULT_STORE_PATH, limit=None):
+    conn = connect_store(path)
+    try:
+        query = ("SELECT run_id, started_at, git_revision, config, host, backend_versions "
+                 "FROM runs ORDER BY started_at DESC, rowid DESC")
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return [_run_metadata(row) for row in conn.execute(query)]
+    finally:
+        conn.close()
+
+
+def load_run(run_id, path=DEFAULT_STORE_PATH):
+    conn = connect_store(path)
+    try:
+        row = conn.execute(
+            "SELECT run_id, started_at, git_revision, config, host, backend_versions FROM runs WHERE run_id = ?",
+            (run_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Nie znaleziono przebiegu {run_id}")
+
+        results = {}
+        for backend, data_size, test_name, value in conn.execute(
+                "SELECT backend, data_size, test_name, seconds FROM results WHERE run_id = ? ORDER BY rowid",
+                (run_id,)):
+            results.setdefault(backend, {}).setdefault(data_size, {})[test_name] = value
+
+        details = {}
+        for backend, data_size, payload in conn.execute(
+                "SELECT backend, data_size, payload FROM details WHERE run_id = ?", (run_id,)):
+            details.setdefault(backend, {})[data_size] = dict(json.loads(payload), samples={})
+
+        for backend, data_size, test_name, value in conn.execute(
+                "SELECT backend, data_size, test_name, seconds FROM samples WHERE run_id = ? "
+                "ORDER BY backend, data_size, test_name, iteration", (run_id,)):
+            size_details = details.setdefault(backend, {}).setdefault(data_size, {'samples': {}})
+            size_details['samples'].setdefault(test_name, []).append(value)
+
+        return dict(_run_metadata(row), results=results, details=details)
+    finally:
+        conn.close()
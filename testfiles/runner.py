@@ -0,0 +1,463 @@
+import time
+import tracemalloc
+
+CRUD_OPERATIONS = ['CREATE', 'READ', 'UPDATE', 'DELETE']
+
+# Skan pełnej tabeli/kolekcji oznaczamy jako problem, gdy przegląda co najmniej tyle wierszy.
+LARGE_SCAN_ROWS = 10000
+STATS_CALIBRATION_ROUNDS = 3
+
+# Fazy mierzone po stronie klienta; 'client' to reszta czasu testu (kod testu, sterownik poza wywołaniami).
+LATENCY_PHASES = ['execute', 'fetch', 'commit', 'client']
+
+
+class OperationMeter:
+    def __init__(self):
+        self.counters = {}
+        self.phases = {}
+        self.slowest = None
+        # Instrukcje zapamiętujemy tylko przy zbieraniu planów, żeby nie obciążać zwykłych pomiarów.
+        self.capture_statements = False
+
+    def add(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record_statement(self, statement, seconds):
+        if self.slowest is None or seconds > self.slowest[0]:
+            self.slowest = (seconds, statement)
+
+    def reset(self):
+        self.counters = {}
+        self.phases = {}
+        self.slowest = None
+
+
+def is_plannable(sql):
+    # Plan INSERT ... VALUES jest trywialny; interesują nas zapytania czytające dane.
+    statement = sql.lstrip().upper()
+    return statement.startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE')) or (
+        statement.startswith('INSERT') and 'SELECT' in statement)
+
+
+def plan_nodes(plan):
+    if isinstance(plan, dict):
+        yield plan
+        for value in plan.values():
+            yield from plan_nodes(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_nodes(value)
+
+
+class CountingCursor:
+    def __init__(self, cursor, meter):
+        self._cursor = cursor
+        self._meter = meter
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        rows = iter(self._cursor)
+        while True:
+            start = time.perf_counter()
+            row = next(rows, None)
+            self._meter.add_phase('fetch', time.perf_counter() - start)
+            if row is None:
+                return
+            self._meter.add('rows', 1)
+            yield row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def _count_modified(self):
+        if self._cursor.description is None and self._cursor.rowcount > 0:
+            self._meter.add('rows', self._cursor.rowcount)
+
+    def execute(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        result = self._cursor.execute(operation, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+        self._meter.add_phase('execute', elapsed)
+        if self._meter.capture_statements and isinstance(operation, str) and is_plannable(operation):
+            params = args[0] if args else kwargs.get('params', kwargs.get('vars'))
+            self._meter.record_statement((operation, params), elapsed)
+        self._count_modified()
+        return result
+
+    def executemany(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = self._cursor.executemany(*args, **kwargs)
+        self._meter.add_phase('execute', time.perf_counter() - start)
+        self._count_modified()
+        return result
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._meter.add_phase('fetch', time.perf_counter() - start)
+        if row is not None:
+            self._meter.add('rows', 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._meter.add_phase('fetch', time.perf_counter() - start)
+        self._meter.add('rows', len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._meter.add_phase('fetch', time.perf_counter() - start)
+        self._meter.add('rows', len(rows))
+        return rows
+
+
+class CountingConnection:
+    def __init__(self, conn, meter):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_meter', meter)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._conn.cursor(*args, **kwargs), self._meter)
+
+    def commit(self):
+        start = time.perf_counter()
+        self._conn.commit()
+        self._meter.add_phase('commit', time.perf_counter() - start)
+
+    def rollback(self):
+        start = time.perf_counter()
+        self._conn.rollback()
+        self._meter.add_phase('commit', time.perf_counter() - start)
+
+
+def derive_metrics(test_times, test_counters):
+    metrics = {}
+    for test_name, avg_time in test_times.items():
+        counters = test_counters.get(test_name, {})
+        entry = {'ops_per_second': 1 / avg_time if avg_time > 0 else 0.0}
+        if 'rows' in counters:
+            entry['rows'] = counters['rows']
+            entry['rows_per_second'] = counters['rows'] / avg_time if avg_time > 0 else 0.0
+        for name in ['read_capacity_units', 'write_capacity_units']:
+            if name in counters:
+                entry[name] = counters[name]
+        metrics[test_name] = entry
+    return metrics
+
+
+def derive_crud_metrics(metrics, test_times, crud_categories):
+    crud_metrics = {}
+    for crud_op, test_names in crud_categories.items():
+        members = [test_name for test_name in test_names if test_name in test_times]
+        total_time = sum(test_times[test_name] for test_name in members)
+        if not members or total_time <= 0:
+            continue
+        entry = {'ops_per_second': len(members) / total_time}
+        for name in ['rows', 'read_capacity_units', 'write_capacity_units']:
+            values = [metrics[test_name][name] for test_name in members if name in metrics[test_name]]
+            if values:
+                entry[name] = sum(values)
+        if 'rows' in entry:
+            entry['rows_per_second'] = entry['rows'] / total_time
+        crud_metrics[crud_op] = entry
+    return crud_metrics
+
+
+def run_suite(label, target, tests, crud_categories, data_sizes, runs_per_test,
+              prepare, cleanup, details=None, is_retryable=None, recover=None, max_retries=3,
+              meter=None, duration=None, collect_stats=None, capture_plan=None, profiler=None):
+    individual_results = {}
+    crud_results = {}
+    failed_sizes = []
+
+    for data_size in data_sizes:
+        print(f"\n{'=' * 60}")
+        print(f"TESTY {label.upper()} DLA ROZMIARU DANYCH: {data_size}")
+        print(f"{'=' * 60}")
+
+        individual_results[data_size] = {}
+        crud_results[data_size] = {crud_op: [] for crud_op in CRUD_OPERATIONS}
+
+        load_start = time.time()
+        try:
+            prepare_details = prepare(data_size) or {}
+        except Exception as e:
+            # Niekompletnych danych nie mierzymy - rozmiar trafia do wyników jako nieudany.
+            print(f"❌ Ładowanie danych dla rozmiaru {data_size} nie powiodło się: {e}")
+            failed_sizes.append(data_size)
+            cleanup()
+            continue
+        load_time = time.time() - load_start
+        print(f"Ładowanie danych zajęło {load_time:.2f}s")
+
+        size_details = dict(prepare_details, load_time=load_time, runs_per_test=runs_per_test,
+                            duration=duration, crud_categories=crud_categories, samples={}, offsets={},
+                            serialization_failures={}, retries={}, retry_time={}, server_stats={}, plans={}, phases={})
+        if 'ingestion' in size_details:
+            size_details['ingestion_total'] = summarize_load_stats(size_details['ingestion'])
+            print_load_stats(size_details['ingestion'])
+            total = size_details['ingestion_total']
+            print(f"Razem: {total['rows']} wierszy, {total['rows_per_second']:.1f} wierszy/s, "
+                  f"{total['bytes'] / 1024 / 1024:.2f} MiB, {total['commits']} zatwierdzeń")
+        stats_overhead = calibrate_stats(collect_stats) if collect_stats is not None else {}
+        if stats_overhead:
+            size_details['stats_overhead'] = stats_overhead
+        if details is not None:
+            details[data_size] = size_details
+        if meter is not None:
+            meter.capture_statements = capture_plan is not None
+
+        test_counters = {}
+        for test in tests:
+            times = []
+            offsets = []
+            counters = {}
+            phases = {}
+            status = "OK"
+            failures = 0
+            retries = 0
+            retry_time = 0.0
+            stats_before = collect_stats() if collect_stats is not None else None
+            test_start = time.perf_counter()
+            # W trybie czasowym powtarzamy test aż do upływu duration sekund zamiast runs_per_test razy.
+            while (len(times) < runs_per_test if duration is None
+                   else not times or time.perf_counter() - test_start < duration):
+                attempt = 0
+                try:
+                    while True:
+                        # Mierzymy tylko udaną próbę; nieudane próby i recover() liczymy osobno w retry_time.
+                        if meter is not None:
+                            meter.reset()
+                        start = time.perf_counter()
+                        try:
+                            if profiler is not None:
+                                profiler.run(label, data_size, test.__name__, lambda: test(target))
+                            else:
+                                test(target)
+                            elapsed = time.perf_counter() - start
+                            break
+                        except Exception as e:
+                            if is_retryable is None or not is_retryable(e):
+                                raise
+                            failures += 1
+                            if recover is not None:
+                                recover()
+                            retry_time += time.perf_counter() - start
+                            if attempt >= max_retries:
+                                raise
+                            attempt += 1
+                            retries += 1
+                    times.append(elapsed)
+                    offsets.append(start - test_start)
+                    if meter is not None:
+                        for name, value in meter.counters.items():
+                            counters[name] = counters.get(name, 0) + value
+                        for name, value in meter.phases.items():
+                            phases[name] = phases.get(name, 0.0) + value
+                except AssertionError as e:
+                    status = f"FAIL ({e})"
+                    break
+                except Exception as e:
+                    status = f"ERROR ({e.__class__.__name__})"
+                    break
+
+            size_details['samples'][test.__name__] = times
+            size_details['offsets'][test.__name__] = offsets
+            if stats_before and times:
+                size_details['server_stats'][test.__name__] = stats_delta(
+                    stats_before, collect_stats(), len(times), stats_overhead)
+            # Plan zbieramy raz na rozmiar danych, dla najwolniejszej instrukcji z ostatniego powtórzenia.
+            if capture_plan is not None and times and meter is not None and meter.slowest is not None:
+                try:
+                    size_details['plans'][test.__name__] = capture_plan(meter.slowest[1])
+                except Exception as e:
+                    print(f"Nie udało się pobrać planu dla {test.__name__}: {e}")
+            if meter is not None and times:
+                size_details['phases'][test.__name__] = phase_breakdown(
+                    phases, times, size_details['server_stats'].get(test.__name__, {}))
+            size_details['serialization_failures'][test.__name__] = failures
+            size_details['retries'][test.__name__] = retries
+            size_details['retry_time'][test.__name__] = retry_time
+
+            if times:
+                avg_time = sum(times) / len(times)
+                test_name = test.__name__
+
+                individual_results[data_size][test_name] = avg_time
+                test_counters[test_name] = {name: value / len(times) for name, value in counters.items()}
+
+                for crud_op, test_names in crud_categories.items():
+                    if test_name in test_names:
+                        crud_results[data_size][crud_op].append(avg_time)
+                        break
+            else:
+                print(f"{test.__name__:35} → {status:10} (test nie przeszedł)")
+
+        metrics = derive_metrics(individual_results[data_size], test_counters)
+        metrics.update(derive_crud_metrics(metrics, individual_results[data_size], crud_categories))
+        size_details['metrics'] = metrics
+
+        cleanup()
+
+    final_results = {}
+    for data_size in data_sizes:
+        if data_size in failed_sizes:
+            continue
+        final_results[data_size] = {}
+        for crud_op in CRUD_OPERATIONS:
+            times = crud_results[data_size][crud_op]
+            if times:
+                final_results[data_size][crud_op] = sum(times)
+            else:
+                final_results[data_size][crud_op] = 0.0
+
+        for test_name, time_val in individual_results[data_size].items():
+            final_results[data_size][test_name] = time_val
+
+    return final_results
+
+
+def phase_breakdown(phases, times, server_stats):
+    runs = len(times)
+    breakdown = {name: phases.get(name, 0.0) / runs for name in LATENCY_PHASES if name != 'client'}
+    breakdown['client'] = max(sum(times) / runs - sum(breakdown.values()), 0.0)
+    # Czas wykonania po stronie serwera jest częścią execute/fetch/commit; resztę przypisujemy sieci i sterownikowi.
+    if 'exec_time_ms' in server_stats:
+        breakdown['server'] = server_stats['exec_time_ms'] / 1000
+    return breakdown
+
+
+def stats_delta(before, after, runs, overhead=None):
+    overhead = overhead or {}
+    delta = {}
+    for name, value in after.items():
+        if isinstance(value, str):
+            # Znacznik niedostępnego źródła statystyk (np. brak rozszerzenia) przenosimy bez zmian.
+            delta[name] = value
+        elif name in before and isinstance(value, (int, float)):
+            delta[name] = (value - before[name] - overhead.get(name, 0)) / runs
+    return delta
+
+
+def calibrate_stats(collect_stats, rounds=STATS_CALIBRATION_ROUNDS):
+    # Zapytania o statystyki same zwiększają liczniki serwera (instrukcje, wiersze, czas wykonania).
+    # Koszt jednego odczytu mierzymy na kolejnych odczytach bez testu pomiędzy nimi i odejmujemy od różnic.
+    first = collect_stats()
+    last = first
+    for _ in range(rounds):
+        last = collect_stats()
+    return {name: value for name, value in stats_delta(first, last, rounds).items() if not isinstance(value, str)}
+
+
+def payload_size(value):
+    if isinstance(value, dict):
+        return sum(len(str(key).encode()) + payload_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    if isinstance(value, bytes):
+        return len(value)
+    return len(str(value).encode())
+
+
+def write_in_batches(table, rows, batch_size, write_batch, load_stats=None):
+    step = max(1, batch_size or len(rows))
+    entry = None
+    if load_stats is not None:
+        entry = load_stats.setdefault(table, {'rows': 0, 'bytes': 0, 'commits': 0, 'retries': 0, 'seconds': 0.0,
+                                              'batches': 0, 'batch_latencies': [], 'peak_memory': 0})
+    tracing = entry is not None and tracemalloc.is_tracing()
+    if tracing:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    for start in range(0, len(rows), step):
+        chunk = rows[start:start + step]
+        if entry is not None:
+            entry['bytes'] += payload_size(chunk)
+        batch_start = time.perf_counter()
+        # write_batch zwraca liczbę zatwierdzeń albo krotkę (zatwierdzenia, ponowienia[, zapisane wiersze]).
+        result = write_batch(chunk)
+        result = result if isinstance(result, tuple) else (result, 0)
+        commits, retries = result[:2]
+        written = result[2] if len(result) > 2 else len(chunk)
+        if entry is not None:
+            latency = time.perf_counter() - batch_start
+            entry['rows'] += written
+            entry['commits'] += commits or 0
+            entry['retries'] += retries
+            entry['seconds'] += latency
+            entry['batches'] += 1
+            entry['batch_latencies'].append(latency)
+
+    if tracing:
+        entry['peak_memory'] = max(entry['peak_memory'], tracemalloc.get_traced_memory()[1] - baseline)
+
+
+def run_batch_sweep(label, load, batch_sizes):
+    results = {}
+    for batch_size in batch_sizes:
+        print(f"\n{'=' * 60}")
+        print(f"ŁADOWANIE {label.upper()} - ROZMIAR PARTII: {batch_size}")
+        print(f"{'=' * 60}")
+
+        # Przepustowość mierzymy bez tracemalloc (spowalnia każdą alokację), a szczyt pamięci
+        # w osobnym, śledzonym przebiegu tego samego ładowania.
+        load_stats = {}
+        load(batch_size, load_stats)
+
+        memory_stats = {}
+        tracemalloc.start()
+        try:
+            load(batch_size, memory_stats)
+        finally:
+            tracemalloc.stop()
+        for table, entry in load_stats.items():
+            entry['peak_memory'] = memory_stats.get(table, {}).get('peak_memory', 0)
+
+        summarize_load_stats(load_stats)
+        print_load_stats(load_stats)
+        print("(pamięć zmierzona w osobnym przebiegu z tracemalloc)")
+        results[batch_size] = load_stats
+    return results
+
+
+def summarize_load_stats(load_stats):
+    for entry in load_stats.values():
+        latencies = entry['batch_latencies']
+        entry['rows_per_second'] = entry['rows'] / entry['seconds'] if entry['seconds'] > 0 else 0.0
+        entry['bytes_per_second'] = entry['bytes'] / entry['seconds'] if entry['seconds'] > 0 else 0.0
+        entry['batch_latency_avg'] = sum(latencies) / len(latencies) if latencies else 0.0
+        entry['batch_latency_max'] = max(latencies) if latencies else 0.0
+
+    total = {key: sum(entry[key] for entry in load_stats.values())
+             for key in ['rows', 'bytes', 'commits', 'seconds', 'batches']}
+    total['retries'] = sum(entry.get('retries', 0) for entry in load_stats.values())
+    total['rows_per_second'] = total['rows'] / total['seconds'] if total['seconds'] > 0 else 0.0
+    total['bytes_per_second'] = total['bytes'] / total['seconds'] if total['seconds'] > 0 else 0.0
+    return total
+
+
+def print_load_stats(load_stats):
+    for table, entry in load_stats.items():
+        print(f"{table:15} {entry['rows']:8} wierszy  {entry['rows_per_second']:10.1f} wierszy/s  "
+              f"{entry['bytes'] / 1024:10.1f} KiB  {entry['commits']:6} zatwierdzeń  "
+              f"{entry.get('retries', 0):4} ponowień  "
+              f"partia śr. {entry['batch_latency_avg'] * 1000:8.2f}ms  "
+              f"pamięć {entry['peak_memory'] / 1024:8.1f} KiB")
@@ -0,0 +1,50 @@
+import numpy as np
+
+TARGET_SIZES = (1000000, 10000000)
+
+# Wykładnik powyżej tej wartości traktujemy jako wzrost ponadliniowy.
+SUPERLINEAR_EXPONENT = 1.1
+
+# Prosta przez dwa punkty pasuje zawsze idealnie (R²=1), więc R² i ekstrapolację podajemy od trzech rozmiarów.
+MIN_FIT_SIZES = 3
+
+
+def fit_power_law(sizes, times):
+    points = [(size, time_val) for size, time_val in zip(sizes, times) if size > 0 and time_val > 0]
+    if len({size for size, _ in points}) < 2:
+        return None
+
+    log_sizes = np.log([size for size, _ in points])
+    log_times = np.log([time_val for _, time_val in points])
+    exponent, log_constant = np.polyfit(log_sizes, log_times, 1)
+    residuals = log_times - (log_constant + exponent * log_sizes)
+    total = np.sum((log_times - log_times.mean()) ** 2)
+    underdetermined = len({size for size, _ in points}) < MIN_FIT_SIZES
+
+    return {
+        'exponent': float(exponent),
+        'constant': float(np.exp(log_constant)),
+        'residuals': residuals.tolist(),
+        'r_squared': None if underdetermined else float(1 - np.sum(residuals ** 2) / total) if total > 0 else 1.0,
+        'underdetermined': underdetermined,
+        'sizes': [size for size, _ in points],
+    }
+
+
+def predict(fit, size):
+    return fit['constant'] * size ** fit['exponent']
+
+
+def fit_scaling_models(results, target_sizes=TARGET_SIZES):
+    models = {}
+    for db_name, db_data in results.items():
+        sizes = sorted(db_data)
+        keys = sorted({key for size in sizes for key in db_data[size]})
+        for key in keys:
+            fit = fit_power_law(sizes, [db_data[size].get(key, 0) for size in sizes])
+            if fit is None:
+                continue
+            fit['extrapolated'] = ({} if fit['underdetermined']
+                                   else {target: predict(fit, target) for target in target_sizes})
+            models.setdefault(db_name, {})[key] = fit
+    return models